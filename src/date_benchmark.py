@@ -0,0 +1,62 @@
+"""
+Daty odbiorów: DataProcessor._parse_date (tablica nazw miesięcy) kontra dateparser.parse,
+którego używała wcześniej każda data. Sprawdza też, że obie drogi dają te same daty.
+
+    cd src
+    python date_benchmark.py
+    python date_benchmark.py --year 2024 --repeat 3
+"""
+import argparse
+import calendar
+import time
+
+from garbage.services.DataProcessor import POLISH_MONTHS, DataProcessor
+
+
+def dates(year):
+    """
+    Każdy dzień roku zapisany każdą nazwą miesiąca z tablicy, jak w wierszach CSV (dzień, "Miesiąc", rok).
+    """
+    return [(day, name, year)
+            for month, names in POLISH_MONTHS.items()
+            for name in names
+            for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+
+def best_of(function, items, repeat):
+    """
+    Najkrótszy z kilku przebiegów (s) i wyniki ostatniego.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [function(*item) for item in items]
+        times.append(time.perf_counter() - start)
+    return min(times), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parsowanie dat: tablica nazw miesięcy kontra dateparser")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--repeat", type=int, default=1, help="Liczba przebiegów, liczy się najkrótszy.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    import dateparser
+    import_seconds = time.perf_counter() - start
+
+    items = dates(args.year)
+    table_seconds, table = best_of(DataProcessor()._parse_date, items, args.repeat)
+    dateparser_seconds, parsed = best_of(lambda day, month, year: dateparser.parse(f"{day} {month} {year}"),
+                                         items, args.repeat)
+
+    mismatches = [item for item, a, b in zip(items, table, parsed) if a != b]
+    print(f"import dateparser: {import_seconds * 1000:.0f} ms")
+    print(f"{len(items)} dat   tablica: {table_seconds / len(items) * 1e6:8.2f} µs/datę   "
+          f"dateparser: {dateparser_seconds / len(items) * 1e6:8.1f} µs/datę   "
+          f"{dateparser_seconds / table_seconds:.0f}x")
+    print(f"różne wyniki: {len(mismatches)}" + (f", np. {mismatches[:5]}" if mismatches else ""))
+
+
+if __name__ == "__main__":
+    main()
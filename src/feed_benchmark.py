@@ -0,0 +1,156 @@
+"""
+Test obciążenia serwera subskrypcji (FeedServer): klienci keep-alive w wątkach odpytują ten sam kalendarz
+i mierzą liczbę zapytań na sekundę oraz czasy odpowiedzi dla 200 (gzip i bez), 304 (If-None-Match) i 404.
+
+Bez --url uruchamia FeedServer w tym samym procesie, na tymczasowym cache z jednym kalendarzem
+(klienci i serwer dzielą wtedy GIL – wynik jest dolnym oszacowaniem). Z --url odpytuje działający serwer:
+
+    cd src
+    python feed_benchmark.py
+    python feed_benchmark.py --events 2000 --threads 16 --seconds 10
+    python main.py serve --port 8080 &
+    python feed_benchmark.py --url "http://127.0.0.1:8080/feed.ics?community=...&city=...&street=..."
+"""
+import argparse
+import gzip
+import http.client
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from garbage.model.Garbage import GarbageRegistry
+from garbage.model.Schedule import Schedule
+from garbage.services.CalendarService import CalendarService
+from garbage.services.FeedServer import FeedServer, FeedStore
+from garbage.services.FileService import FileService
+from garbage.services.ResultCache import ResultCache
+from garbage.services.prewarm import INDEX_FILE, MANIFEST_FILE
+
+SCHEDULE_URL = "https://eko-region.pl/wp-content/uploads/benchmark.pdf"
+ADDRESS = {"community": "Gmina Testowa", "city": "Testowo", "street": "ul. Główna"}
+
+
+def prepare_cache(base_dir: Path, events: int) -> str:
+    """
+    Kalendarz z events odbiorami w ResultCache, wpis manifestu i indeksu adresów jak po prewarm.
+    Zwraca ścieżkę zapytania o adres.
+    """
+    file_service = FileService(base_dir)
+    cache = ResultCache(file_service)
+    types = [GarbageRegistry.instances[cls] for cls in GarbageRegistry.registry]
+    schedule = Schedule()
+    for n in range(events):
+        schedule.append(types[n % len(types)], datetime(2025, 1, 1) + timedelta(days=n // len(types)))
+    ics = CalendarService(file_service, schedule, SCHEDULE_URL).prepare_calendar(base_dir / "benchmark.ics",
+                                                                                 streaming=True)
+
+    sha256 = ResultCache.file_digest(ics)  # dowolny stały skrót – serwer nie czyta PDF
+    cache.store(ResultCache.key_from_digest(sha256, 0), 2025, ics=ics)
+    with open(cache.dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump({SCHEDULE_URL: {"sha256": sha256, "pages": 1}}, f)
+    with open(cache.dir / INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump([{**ADDRESS, "schedule": {"name": ADDRESS["street"], "inhabited": SCHEDULE_URL,
+                                            "uninhabited": None}}], f, ensure_ascii=False)
+    return "/feed.ics?" + urlencode(ADDRESS)
+
+
+def fetch(host, port, path, headers=None):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def load(host, port, path, headers, threads, seconds):
+    """
+    Zwraca (zapytania/s, mediana ms, p99 ms, liczba odpowiedzi dla każdego statusu).
+    """
+    latencies = [[] for _ in range(threads)]
+    statuses = [{} for _ in range(threads)]
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                break
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            latencies[i].append(time.perf_counter() - start)
+            statuses[i][response.status] = statuses[i].get(response.status, 0) + 1
+        connection.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    times = sorted(t for per_thread in latencies for t in per_thread)
+    counts = {}
+    for per_thread in statuses:
+        for status, count in per_thread.items():
+            counts[status] = counts.get(status, 0) + count
+    if not times:
+        return 0.0, 0.0, 0.0, counts
+    return (len(times) / seconds, times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000, counts)
+
+
+def run(host, port, path, threads, seconds):
+    status, headers, body = fetch(host, port, path)
+    if status != 200:
+        raise SystemExit(f"{path}: status {status}, oczekiwano 200")
+    _, gzip_headers, gzip_body = fetch(host, port, path, {"Accept-Encoding": "gzip"})
+    if gzip.decompress(gzip_body) != body:
+        raise SystemExit(f"{path}: treść gzip różni się od nieskompresowanej")
+    print(f"kalendarz: {len(body) / 1024:.1f} kB, gzip {len(gzip_body) / 1024:.1f} kB")
+
+    scenarios = [
+        ("200 gzip", {"Accept-Encoding": "gzip"}, path, 200),
+        ("200 bez kompresji", {}, path, 200),
+        ("304 If-None-Match", {"Accept-Encoding": "gzip", "If-None-Match": gzip_headers["ETag"]}, path, 304),
+        ("404 nieznany adres", {}, "/feed.ics?" + urlencode({"community": "brak", "city": "brak"}), 404),
+    ]
+    for name, request_headers, request_path, expected in scenarios:
+        rate, median, p99, counts = load(host, port, request_path, request_headers, threads, seconds)
+        unexpected = {status: count for status, count in counts.items() if status != expected}
+        print(f"{name:<20} {rate:8.0f} zapytań/s   mediana {median:6.2f} ms   p99 {p99:6.2f} ms"
+              + (f"   inne statusy: {unexpected}" if unexpected else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążenia serwera kalendarzy (FeedServer)")
+    parser.add_argument("--url", type=str, default=None, help="Adres kalendarza na działającym serwerze.")
+    parser.add_argument("--events", type=int, default=200, help="Liczba odbiorów w kalendarzu testowym.")
+    parser.add_argument("--threads", type=int, default=8, help="Liczba klientów keep-alive.")
+    parser.add_argument("--seconds", type=float, default=5, help="Czas każdego scenariusza.")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        run(url.hostname, url.port or 80, f"{url.path}?{url.query}" if url.query else url.path,
+            args.threads, args.seconds)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = prepare_cache(Path(directory), args.events)
+        server = FeedServer(("127.0.0.1", 0), FeedStore(FileService(Path(directory))))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            run("127.0.0.1", server.server_address[1], path, args.threads, args.seconds)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
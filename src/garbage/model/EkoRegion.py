@@ -15,3 +15,19 @@ class ResponseData:
 
         if self.inhabited and self.inhabited == "#":
             self.inhabited = None
+
+
+@dataclass
+class AddressEntry:
+    community: str
+    city: str
+    street: Optional[str]
+    schedule: ResponseData
+
+    @property
+    def inhabited(self) -> Optional[str]:
+        return self.schedule.inhabited
+
+    @property
+    def uninhabited(self) -> Optional[str]:
+        return self.schedule.uninhabited
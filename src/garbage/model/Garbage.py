@@ -1,11 +1,32 @@
+from functools import lru_cache
+
+
 class GarbageRegistry:
     registry = []
+    # jedna współdzielona instancja na typ – typy są niezmienne, nie ma potrzeby tworzyć ich dla każdego wpisu
+    instances = {}
 
     @classmethod
     def register(cls, garbage_cls):
         cls.registry.append(garbage_cls)
+        cls.instances[garbage_cls] = garbage_cls()
+        cls.resolve.cache_clear()
         return garbage_cls
 
+    @classmethod
+    @lru_cache(maxsize=256)
+    def resolve(cls, header: str) -> "Garbage | None":
+        """
+        Typ odpadów dla nagłówka kolumny (dopasowanie wzorców bez rozróżniania wielkości liter).
+        Wynik jest zapamiętywany, więc rejestr przeszukiwany jest raz na unikalny nagłówek.
+        """
+        header = header.lower().strip()
+        for garbage_cls in cls.registry:
+            patterns = getattr(garbage_cls, "match_patterns", [])
+            if any(p.lower() in header for p in patterns):
+                return cls.instances[garbage_cls]
+        return None
+
 class Garbage:
     name = "generic"
     hash_id = "#generic"
@@ -4,6 +4,8 @@ from garbage.model.Garbage import Garbage
 
 
 class GarbageCollect:
+    __slots__ = ("garbage_type", "date", "additional_info")
+
     def __init__(self, garbage_type, date, additional_info):
         self.garbage_type: Garbage = garbage_type
         self.date: datetime = date
@@ -0,0 +1,119 @@
+from array import array
+from datetime import datetime
+
+from garbage.model.Garbage import Garbage, GarbageRegistry
+from garbage.model.GarbageCollect import GarbageCollect
+
+
+class Schedule:
+    """
+    Kolumnowy harmonogram odbiorów: data jako ordinal, typ jako indeks w GarbageRegistry,
+    adnotacja jako indeks w tablicy unikalnych tekstów. Iteracja zwraca GarbageCollect
+    tworzone na żądanie, więc w pamięci trzymane są tylko trzy tablice liczb.
+    """
+
+    __slots__ = ("_ordinals", "_types", "_notes", "_note_values", "_note_index")
+
+    NO_NOTE = 0
+
+    def __init__(self, entries=()):
+        self._ordinals = array("i")
+        self._types = array("B")
+        self._notes = array("I")
+        # indeks 0 zarezerwowany dla braku adnotacji
+        self._note_values: list[str | None] = [None]
+        self._note_index: dict[str | None, int] = {None: self.NO_NOTE}
+        self.extend(entries)
+
+    def append(self, garbage_type: Garbage, date: datetime, additional_info: str | None = None):
+        self._ordinals.append(date.toordinal())
+        self._types.append(GarbageRegistry.registry.index(type(garbage_type)))
+        self._notes.append(self._intern(additional_info))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry.garbage_type, entry.date, entry.additional_info)
+
+    def filter(self, garbage_type: type[Garbage] | Garbage | None = None, start: datetime | None = None,
+               end: datetime | None = None) -> "Schedule":
+        """
+        Wpisy danego typu i/lub z zakresu dat [start, end] (obie granice włącznie).
+        """
+        code = None
+        if garbage_type is not None:
+            garbage_cls = garbage_type if isinstance(garbage_type, type) else type(garbage_type)
+            code = GarbageRegistry.registry.index(garbage_cls)
+        low = start.toordinal() if start else None
+        high = end.toordinal() if end else None
+
+        return self._select(
+            i for i, ordinal in enumerate(self._ordinals)
+            if (code is None or self._types[i] == code)
+            and (low is None or ordinal >= low)
+            and (high is None or ordinal <= high)
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Postać do zapisu w JSON; typy zapisywane po nazwie klasy, żeby nie zależeć od kolejności rejestracji.
+        """
+        return {
+            "types": [cls.__name__ for cls in GarbageRegistry.registry],
+            "notes": self._note_values[1:],
+            "ordinals": self._ordinals.tolist(),
+            "type_codes": self._types.tolist(),
+            "note_codes": self._notes.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Schedule":
+        by_name = {garbage_cls.__name__: code for code, garbage_cls in enumerate(GarbageRegistry.registry)}
+        type_codes = [by_name[name] for name in data["types"]]
+
+        schedule = cls()
+        for note in data["notes"]:
+            schedule._intern(note)
+        schedule._ordinals.extend(data["ordinals"])
+        schedule._types.extend(type_codes[code] for code in data["type_codes"])
+        schedule._notes.extend(data["note_codes"])
+        return schedule
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._entry(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._select(range(len(self))[index])
+        return self._entry(range(len(self))[index])
+
+    def __repr__(self):
+        return f"Schedule({len(self)} wpisów)"
+
+    def _entry(self, i) -> GarbageCollect:
+        garbage_cls = GarbageRegistry.registry[self._types[i]]
+        return GarbageCollect(GarbageRegistry.instances[garbage_cls],
+                              datetime.fromordinal(self._ordinals[i]),
+                              self._note_values[self._notes[i]])
+
+    def _select(self, indexes) -> "Schedule":
+        # adnotacje współdzielone z oryginałem – indeksy pozostają ważne
+        schedule = Schedule()
+        schedule._note_values = self._note_values
+        schedule._note_index = self._note_index
+        for i in indexes:
+            schedule._ordinals.append(self._ordinals[i])
+            schedule._types.append(self._types[i])
+            schedule._notes.append(self._notes[i])
+        return schedule
+
+    def _intern(self, note: str | None) -> int:
+        code = self._note_index.get(note)
+        if code is None:
+            code = len(self._note_values)
+            self._note_values.append(note)
+            self._note_index[note] = code
+        return code
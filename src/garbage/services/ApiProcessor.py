@@ -3,7 +3,7 @@ import logging
 from bs4 import BeautifulSoup
 
 from garbage.model.EkoRegion import ResponseData
-from garbage.services.ApiService import ApiService
+from garbage.services.ApiService import ApiService, ApiError
 from garbage.services.Decorators import first_empty_element
 from garbage.services.FileService import FileService
 
@@ -12,8 +12,10 @@ class ApiProcessor:
 
     api = ApiService()
 
-    def __init__(self, file_service: FileService):
+    def __init__(self, file_service: FileService, api: ApiService | None = None):
         self.file_service = file_service
+        if api is not None:
+            self.api = api
 
     @first_empty_element
     def get_community(self):
@@ -45,10 +47,10 @@ class ApiProcessor:
     def get_file_from_url(self, url, destination_path):
         try:
             response = self.api.get_file(url)
-            response.raise_for_status()
             self.file_service.save_downloaded_file(destination_path, response)
-        except Exception as e:
+        except ApiError as e:
             logging.error("Błąd pobierania: {}".format(e))
+            raise
 
     def _process_city(self, selector):
         response = []
@@ -1,41 +1,82 @@
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ApiError(Exception):
+    pass
+
+
+class ApiConnectionError(ApiError):
+    """Brak połączenia, przekroczony czas lub wyczerpane ponowienia."""
+
+
+class ApiResponseError(ApiError):
+    """Serwer odpowiedział statusem innym niż oczekiwany."""
+
+    def __init__(self, status_code: int, url: str, body: str = ""):
+        super().__init__(f"{status_code} dla {url}: {body[:200]}")
+        self.status_code = status_code
+        self.url = url
 
 
 class ApiService:
 
     BASE_URL = "https://eko-region.pl"
 
+    TIMEOUT = (5, 30)             # (połączenie, odczyt) w sekundach
+    RETRIES = 3
+    BACKOFF_FACTOR = 0.5          # odstępy 0.5s, 1s, 2s...
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    POOL_CONNECTIONS = 4          # liczba hostów trzymanych w puli
+    POOL_MAXSIZE = 16             # połączeń keep-alive na host
+
+    def __init__(self, base_url: str | None = None, timeout=TIMEOUT, retries: int = RETRIES,
+                 backoff_factor: float = BACKOFF_FACTOR, pool_maxsize: int = POOL_MAXSIZE):
+        # inny adres bazowy np. dla lokalnego serwera z danymi testowymi
+        self.base_url = base_url or self.BASE_URL
+        self.timeout = timeout
+        self.session = self._create_session(retries, backoff_factor, pool_maxsize)
+
+    def _create_session(self, retries, backoff_factor, pool_maxsize) -> requests.Session:
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,  # ostatnia odpowiedź trafia do _check_response
+        )
+        adapter = HTTPAdapter(pool_connections=self.POOL_CONNECTIONS, pool_maxsize=pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     # TODO: czy 2 api_caller potrzebne ?
-    def _api_caller(self, request_type: str, url, data=None) -> Response | None:
+    def _api_caller(self, request_type: str, url, data=None) -> Response:
         headers = self._set_headers()
-
-        # TODO: obsługa błędów > 400
         response = self._make_api_call(request_type, url, headers, data)
-        if response.status_code == 200:
-            return response
-        else:
-            print(f"{response.status_code}: {response.text}")
+        return self._check_response(response)
 
-    def _api_caller_file(self, request_type: str, url, data=None, stream=True) -> Response | None:
-        response = self._make_api_call(request_type, url, headers=None, data=data, stream=stream)
-        if response.status_code == 200:
+    def _api_caller_file(self, request_type: str, url, data=None, stream=True, headers=None,
+                         ok_statuses=(200,)) -> Response:
+        response = self._make_api_call(request_type, url, headers=headers, data=data, stream=stream)
+        return self._check_response(response, ok_statuses)
+
+    def _check_response(self, response: Response, ok_statuses=(200,)) -> Response:
+        if response.status_code in ok_statuses:
             return response
-        else:
-            print(f"{response.status_code}: {response.text}")
-
-    def _make_api_call(self, request_type: str, url, headers=None, data=None, stream=False):
-        match request_type:
-            case "GET":
-                return requests.get(url, data=data, headers=headers, stream=stream)
-            case "POST":
-                return requests.post(url, data=data, headers=headers)
-            case "PUT":
-                return requests.put(url, data=data, headers=headers)
-            case "DELETE":
-                return requests.delete(url, data=data, headers=headers)
-            case _:
-                raise Exception("Non defined request type")
+        raise ApiResponseError(response.status_code, response.url, response.text)
+
+    def _make_api_call(self, request_type: str, url, headers=None, data=None, stream=False) -> Response:
+        if request_type not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Non defined request type: {request_type}")
+        try:
+            return self.session.request(request_type, url, data=data, headers=headers, stream=stream,
+                                        timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.RetryError) as e:
+            raise ApiConnectionError(f"{request_type} {url}: {e}") from e
 
     def _set_headers(self):
         return {
@@ -52,7 +93,7 @@ class ApiService:
                                 )
 
     def get_community(self):
-        return self._api_caller("GET", f"{self.BASE_URL}/harmonogram-odbioru-odpadow/")
+        return self._api_caller("GET", f"{self.base_url}/harmonogram-odbioru-odpadow/")
 
     def get_cities(self, url):
         return self._api_caller("GET", url)
@@ -65,3 +106,15 @@ class ApiService:
                                    url=url,
                                    stream=True
                                    )
+
+    def get_file_if_modified(self, url, etag=None, last_modified=None):
+        """
+        Pobranie warunkowe – status 304 oznacza, że plik się nie zmienił.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return self._api_caller_file(request_type="GET", url=url, stream=True, headers=headers,
+                                     ok_statuses=(200, 304))
@@ -1,51 +1,246 @@
 import datetime
+import logging
 import uuid
+from dataclasses import dataclass, field
 from datetime import timedelta
-
-from icalendar import Calendar, Event
+from pathlib import Path
 
 from garbage.model.GarbageCollect import GarbageCollect
+from garbage.model.Schedule import Schedule
 from garbage.services.FileService import FileService
+from garbage.services.IcsWriter import IcsWriter
+from garbage.services.Recurrence import Series, compress
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CalendarDiff:
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
 
 
 class CalendarService:
 
     _output_file_template = "Eko-Region-%s.ics"
+    # stała przestrzeń nazw UID – ten sam odbiór w tym samym kalendarzu zawsze ma ten sam UID
+    UID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://eko-region.pl/harmonogram")
+    # metadane wydarzenia, które nie świadczą o zmianie jego treści
+    _EVENT_METADATA = ("UID", "DTSTAMP", "SEQUENCE")
 
-    def __init__(self, file_service: FileService, schedule: list[GarbageCollect]):
+    def __init__(self, file_service: FileService, schedule: Schedule | list[GarbageCollect],
+                 calendar_id: str | None = None):
+        """
+        calendar_id – identyfikator harmonogramu w UID, stały między wersjami harmonogramu (calendar_id_for);
+                      bez niego pełna ścieżka pliku ICS – kolejne wersje zapisywane w to samo miejsce
+                      zachowują UID, a diff obejmuje tylko faktycznie zmienione odbiory
+        """
         self.file_service: FileService = file_service
-        self.calendar = Calendar()
+        self.calendar = None
         self.schedule = schedule
+        self.calendar_id = calendar_id
+        self.diff: CalendarDiff | None = None
+        self._diff_events = []
+
+    def prepare_calendar(self, output_path=None, streaming=False, diff_path=None, recurrence=False):
+        """
+        streaming – zapis przez IcsWriter, bez budowania obiektu Calendar (duże harmonogramy, batch)
+        recurrence – regularne odbiory jako serie RRULE + EXDATE + RDATE zamiast osobnych wydarzeń
+        diff_path – dodatkowy plik ICS tylko z wydarzeniami dodanymi, zmienionymi i odwołanymi
+                    względem poprzedniej wersji kalendarza w output_path
+        Niezmienione wydarzenia zachowują DTSTAMP i SEQUENCE z poprzedniej wersji.
+        """
+        calendar_file_name = output_path or self.file_name_for(self.schedule[0].date.year)
+        calendar_id = self.calendar_id or self.calendar_id_for(Path(calendar_file_name).resolve())
+        previous = self._read_previous_events(calendar_file_name)
+        events = self._events(calendar_id, previous, recurrence)
+
+        if streaming:
+            with self.file_service.open_ics(calendar_file_name) as stream:
+                self._write_calendar(stream, events)
+        else:
+            # icalendar tylko dla zapisu bez strumieniowania
+            from icalendar import Calendar
+
+            self.calendar = Calendar()
+            self._define_calendar_base_info()
+            for properties in events:
+                self.calendar.add_component(self._create_event(properties))
+            self.file_service.save_ics(calendar_file_name, self.calendar)
+
+        logger.info(f"Kalendarz {calendar_file_name}: {len(self.diff.added)} nowych, {len(self.diff.changed)} "
+                    f"zmienionych, {len(self.diff.cancelled)} odwołanych wydarzeń")
+        if diff_path:
+            with self.file_service.open_ics(diff_path) as stream:
+                self._write_diff(stream)
+        return calendar_file_name
+
+    @classmethod
+    def file_name_for(cls, year) -> str:
+        return cls._output_file_template % year
+
+    @staticmethod
+    def calendar_id_for(source, page_number: int | None = None) -> str:
+        """
+        Identyfikator harmonogramu ze źródła, które nie zmienia się między wersjami harmonogramu
+        (URL PDF adresu, ścieżka pliku ICS) – nie z treści, bo wtedy każda zmiana daty zmienia wszystkie UID.
+        """
+        return str(source) if page_number is None else f"{source}#{page_number}"
+
+    @classmethod
+    def event_uid(cls, calendar_id: str, entry: GarbageCollect) -> str:
+        return str(uuid.uuid5(cls.UID_NAMESPACE,
+                              f"{calendar_id}/{entry.garbage_type.hash_id}/{entry.date.date().isoformat()}"))
+
+    @classmethod
+    def series_uid(cls, calendar_id: str, series: Series) -> str:
+        return str(uuid.uuid5(cls.UID_NAMESPACE,
+                              f"{calendar_id}/{series.garbage_type.hash_id}/{series.start.isoformat()}/rrule"))
 
-    def prepare_calendar(self):
-        self._define_calendar_base_info()
+    def _events(self, calendar_id, previous: dict[str, dict[str, str]], recurrence=False):
+        """
+        Właściwości kolejnych wydarzeń; przy okazji porównuje je z poprzednią wersją kalendarza.
+        """
+        self.diff = CalendarDiff()
+        self._diff_events = []
+        now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        seen = set()
 
-        for entry in self.schedule:
-            event = self._create_event(entry)
-            self.calendar.add_component(event)
+        for entry in compress(self.schedule) if recurrence else self.schedule:
+            if isinstance(entry, Series):
+                uid = self.series_uid(calendar_id, entry)
+                properties = self._series_properties(entry)
+            else:
+                uid = self.event_uid(calendar_id, entry)
+                properties = self._event_properties(entry)
+            if uid in seen:
+                logger.debug(f"Powtórzony odbiór {entry}, pomijam.")
+                continue
+            seen.add(uid)
 
-        year = self.schedule[0].date.year
-        calendar_file_name = self._output_file_template % year
-        self.file_service.save_ics(calendar_file_name, self.calendar)
+            old = previous.get(uid)
+            stamp, sequence, unchanged = now, 0, False
+            if old is None:
+                self.diff.added.append(uid)
+            else:
+                sequence = self._previous_sequence(old)
+                unchanged = self._is_unchanged(properties, old)
+                if unchanged:
+                    stamp = self._previous_stamp(old) or now
+                else:
+                    sequence += 1
+                    self.diff.changed.append(uid)
 
+            event = [("UID", uid), ("DTSTAMP", stamp), ("SEQUENCE", sequence), *properties]
+            if not unchanged:
+                self._diff_events.append(event)
+            yield event
+
+        for uid, old in previous.items():
+            if uid not in seen:
+                self.diff.cancelled.append(uid)
+                self._diff_events.append(self._cancelled_event(old, now))
+
+    def _write_calendar(self, stream, events):
+        """
+        Zapisuje kalendarz do strumienia binarnego (plik, gniazdo) wydarzenie po wydarzeniu.
+        """
+        writer = IcsWriter(stream)
+        writer.begin("VCALENDAR")
+        writer.write_properties(self._calendar_properties())
+        for properties in events:
+            writer.write_component("VEVENT", properties)
+        writer.end("VCALENDAR")
+
+    def _write_diff(self, stream):
+        writer = IcsWriter(stream)
+        writer.begin("VCALENDAR")
+        writer.write_properties([*self._calendar_properties(), ("METHOD", "PUBLISH")])
+        for event in self._diff_events:
+            # odwołane wydarzenia to gotowe linie z poprzedniej wersji pliku
+            if isinstance(event, tuple):
+                writer.write_lines("VEVENT", event)
+            else:
+                writer.write_component("VEVENT", event)
+        writer.end("VCALENDAR")
+
+    def _read_previous_events(self, calendar_file_name) -> dict[str, dict[str, str]]:
+        if not self.file_service.file_exists(calendar_file_name):
+            return {}
+        events = IcsWriter.read_components(self.file_service.read_ics(calendar_file_name))
+        # UID w postaci ':<uuid>'
+        return {event["UID"][1:]: event for event in events if "UID" in event}
+
+    def _is_unchanged(self, properties, old: dict[str, str]) -> bool:
+        new = {name: IcsWriter.format_value(value) for name, value in properties if value is not None}
+        return new == {name: rest for name, rest in old.items() if name not in self._EVENT_METADATA}
+
+    def _previous_sequence(self, old: dict[str, str]) -> int:
+        try:
+            return int(old.get("SEQUENCE", ":0")[1:])
+        except ValueError:
+            return 0
+
+    def _previous_stamp(self, old: dict[str, str]) -> datetime.datetime | None:
+        try:
+            stamp = datetime.datetime.strptime(old.get("DTSTAMP", "")[1:].rstrip("Z"), "%Y%m%dT%H%M%S")
+        except ValueError:
+            return None
+        return stamp.replace(tzinfo=datetime.timezone.utc)
+
+    def _cancelled_event(self, old: dict[str, str], now) -> tuple[str, ...]:
+        lines = [name + rest for name, rest in old.items() if name not in ("DTSTAMP", "SEQUENCE", "STATUS")]
+        return (*lines,
+                IcsWriter.content_line("DTSTAMP", now),
+                IcsWriter.content_line("SEQUENCE", self._previous_sequence(old) + 1),
+                "STATUS:CANCELLED")
 
     def _define_calendar_base_info(self):
-        self.calendar.add("PRODID", "-//Vertig0//Harmonogram wywozu śmieci//PL")
-        self.calendar.add("VERSION", "2.0")
-        self.calendar.add("CALSCALE", "GREGORIAN")
-        self.calendar.add("NAME", "Śmieci")
-        self.calendar.add("DESCRIPTION", "Harmonogram wywozu śmieci")
+        for name, value in self._calendar_properties():
+            self.calendar.add(name, value)
+
+    def _calendar_properties(self):
+        return [
+            ("VERSION", "2.0"),
+            ("PRODID", "-//Vertig0//Harmonogram wywozu śmieci//PL"),
+            ("CALSCALE", "GREGORIAN"),
+            ("NAME", "Śmieci"),
+            ("DESCRIPTION", "Harmonogram wywozu śmieci"),
+        ]
+
+    def _create_event(self, properties):
+        from icalendar import Event
 
-    def _create_event(self, entry: GarbageCollect) -> Event:
         event = Event()
-        event.add("UID", uuid.uuid4())
-        event.add("SUMMARY", f"Śmieci {entry.garbage_type.name}")
-        event.add("DESCRIPTION", entry.garbage_type.hash_id)
-        event.add("DTSTART", entry.date.date())
-        event.add("DTSTAMP", datetime.datetime.now())
-        event.add("DTEND", (entry.date + timedelta(days=1)).date())
-        event.add("COMMENT", entry.additional_info)
-        event.add("COLOR", entry.garbage_type.color)
-        event.add("TRANSP", "TRANSPARENT")
-        event.add("STATUS", "CONFIRMED")
+        for name, value in properties:
+            if value is not None:
+                event.add(name, value)
         return event
+
+    def _event_properties(self, entry: GarbageCollect):
+        return [
+            ("SUMMARY", f"Śmieci {entry.garbage_type.name}"),
+            ("DESCRIPTION", entry.garbage_type.hash_id),
+            ("DTSTART", entry.date.date()),
+            ("DTEND", (entry.date + timedelta(days=1)).date()),
+            # brak adnotacji – bez COMMENT (wcześniej zapisywało się "None")
+            ("COMMENT", entry.additional_info),
+            ("COLOR", entry.garbage_type.color),
+            ("TRANSP", "TRANSPARENT"),
+            ("STATUS", "CONFIRMED"),
+        ]
+
+    def _series_properties(self, series: Series):
+        return [
+            ("SUMMARY", f"Śmieci {series.garbage_type.name}"),
+            ("DESCRIPTION", series.garbage_type.hash_id),
+            ("DTSTART", series.start),
+            ("DTEND", series.start + timedelta(days=1)),
+            ("RRULE", series.rule()),
+            ("EXDATE", series.exdates or None),
+            ("RDATE", series.rdates or None),
+            ("COLOR", series.garbage_type.color),
+            ("TRANSP", "TRANSPARENT"),
+            ("STATUS", "CONFIRMED"),
+        ]
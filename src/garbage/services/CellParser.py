@@ -0,0 +1,156 @@
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# treść komórek powtarza się między miesiącami i harmonogramami
+CACHE_SIZE = 4096
+
+SEPARATORS = frozenset(("i", "j", "|"))
+
+_WHITESPACE = re.compile(r"\s+")
+_CELL_SPLIT = re.compile(r"[,\s]+")
+_DIGIT = re.compile(r"\d")
+_LETTERS_AND_STAR = re.compile(r"[^\W\d_]|[*]")
+_REPEATED_I = re.compile(r"(?:\bi\b[\s]*){2,}")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fix_ocr_text(t: str) -> str:
+    """
+    Naprawia typowe błędy OCR w tabeli:
+      - ' j ' -> ' i '
+      - '9 1 23' -> '9 i 23'
+      - '141 28' -> '14 i 28'
+      - '111 25' -> '11 i 25'
+    Zasada: tylko rozdzielamy ostatnią cyfrę '1' z lewego tokena jeśli
+    po rozdziale zakładamy sensowne dni (1-31) i po prawej też jest liczba 1-31.
+    """
+    if not t:
+        return t
+
+    # normalizacja
+    s = t.strip()
+    s = s.replace(' j ', ' i ')
+    s = _WHITESPACE.sub(' ', s)
+
+    tokens = s.split(' ')
+    out = []
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+
+        # jeżeli token to dokładnie 'i' -> zostaw
+        if tok == 'i':
+            # unikamy powtórzeń 'i i'
+            if not (out and out[-1] == 'i'):
+                out.append('i')
+            i += 1
+            continue
+
+        # jeśli mamy pojedyncze '1' pomiędzy liczbami -> separator 'i'
+        if tok == '1' and i - 1 >= 0 and i + 1 < len(tokens):
+            if tokens[i - 1].isdigit() and tokens[i + 1].isdigit():
+                # zamień '1' będące separatorem na 'i'
+                if not (out and out[-1] == 'i'):
+                    out.append('i')
+                i += 1
+                continue
+
+        # jeśli token jest cyfrowy i kończy się na '1' oraz istnieje nast. token cyfrowy,
+        # spróbuj rozdzielić ostatnią '1' jako 'i' -> left + 'i' + next
+        if tok.isdigit() and tok.endswith('1') and len(tok) >= 2 and (i + 1) < len(tokens) and tokens[
+            i + 1].isdigit():
+            left = tok[:-1]
+            # walidacja: left i next muszą być plausybilne dni 1-31
+            try:
+                if 1 <= int(left) <= 31 and 1 <= int(tokens[i + 1]) <= 31:
+                    # dodaj left i separator 'i' (unikaj powtórzeń)
+                    if not (out and out[-1] == left):
+                        out.append(left)
+                    if not (out and out[-1] == 'i'):
+                        out.append('i')
+                    # nie konsumujemy next tutaj — zostanie dodany w kolejnym kroku
+                    i += 1
+                    continue
+            except ValueError:
+                pass  # jeśli nie da się zamienić, traktujemy normalnie
+
+        # default: dodaj token (ale unikaj duplikatów spacji / i i)
+        out.append(tok)
+        i += 1
+
+    # finalna normalizacja: usuń powtórne 'i' lub spacje
+    res = ' '.join(out)
+    res = _WHITESPACE.sub(' ', res).strip()
+    # czasami powstały "i i" — zamień wielokrotne na jedno
+    res = _REPEATED_I.sub('i ', res).strip()
+    return res
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_cell(text: str) -> tuple[tuple, tuple] | None:
+    """
+    Zamienia tekst komórki na (dni, adnotacje):
+      - separatory 'i', 'j', '|' są pomijane,
+      - token z cyfrą i '*' -> dzień (bez liter i '*') + adnotacja,
+      - token z cyfrą -> dni po rozwiązaniu sklejonych liczb (resolve_numbers),
+      - sam tekst -> adnotacja.
+    Wynik jest niezmienny (krotki), bo trafia do cache.
+    """
+    if not text:
+        return None
+
+    # fałszywe '1' pomiędzy liczbami to separator
+    if " 1 " in text:
+        text = text.replace(" 1 ", " i ")
+
+    days = []
+    annotations = []
+    for token in _CELL_SPLIT.split(text.strip()):
+        if token in SEPARATORS:
+            continue
+        if _DIGIT.search(token):
+            # jeśli w tokenie jest * -> prawdopodobnie data z komentarzem
+            if "*" in token:
+                days.append(_LETTERS_AND_STAR.sub("", token))
+                annotations.append(token)
+            else:
+                days.extend(resolve_numbers(_LETTERS_AND_STAR.sub("", token)))
+        else:
+            # sam tekst to dodatkowe info
+            annotations.append(token)
+
+    logger.debug(f"({text}) -> dni {days}, adnotacje {annotations}")
+    return tuple(days), tuple(annotations)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def resolve_numbers(number: str | int) -> tuple[int, ...]:
+    """
+    Liczba spoza zakresu dni to najczęściej dni sklejone przez OCR z separatorem 'i'
+    odczytanym jako '1' (np. '5118' -> 5 i 18). Próbujemy każdej '1' (poza pierwszą cyfrą)
+    jako separatora; poprawny podział to rosnące dni odległe o więcej niż tydzień.
+    """
+    number = int(number)
+    if is_calendar_day(number):
+        return (number,)
+
+    digits = str(number)
+    if not digits.isdigit():
+        # liczba ujemna ('-' sklejony z dniem) to nie są dni – jak dawniej w DataProcessor kończy się ValueError,
+        # zamiast trafić jako np. -51 do dateparsera
+        raise ValueError(f"Niepoprawny numer dnia: {number}")
+    possible_ok = ()
+    for idx in range(1, len(digits)):
+        if digits[idx] != "1":
+            continue
+        parts = [int(part) for part in (digits[:idx], digits[idx + 1:]) if part]
+        if all(a + 7 < b for a, b in zip(parts, parts[1:])):
+            possible_ok = tuple(parts)
+    return possible_ok
+
+
+def is_calendar_day(number) -> bool:
+    return 1 <= number <= 31
@@ -0,0 +1,95 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+
+from garbage.model.EkoRegion import AddressEntry
+from garbage.services.ApiProcessor import ApiProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class Crawler:
+    """
+    Przechodzi całe drzewo gmina -> miejscowość -> ulica na eko-region.pl współbieżnie
+    i buduje indeks adres -> link do PDF z harmonogramem.
+    """
+
+    DEFAULT_WORKERS = 8
+    DEFAULT_DELAY = 0.2   # minimalny odstęp (s) między kolejnymi zapytaniami do serwera
+
+    def __init__(self, api_processor: ApiProcessor, max_workers: int = DEFAULT_WORKERS,
+                 delay: float = DEFAULT_DELAY):
+        self.api_processor = api_processor
+        self.max_workers = max_workers
+        self.delay = delay
+        self.failures = []
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def crawl(self) -> list[AddressEntry]:
+        start = time.perf_counter()
+        communities = {name: url for name, url in self._fetch(self.api_processor.get_community).items() if url}
+        entries = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            city_futures = {
+                pool.submit(self._fetch, self.api_processor.get_city, url): name
+                for name, url in communities.items()
+            }
+            street_futures = {}
+            for future in as_completed(city_futures):
+                community = city_futures[future]
+                for city in self._result(future, community):
+                    if city.has_street:
+                        future_streets = pool.submit(self._fetch, self.api_processor.get_streets, city.streets_link)
+                        street_futures[future_streets] = (community, city)
+                    else:
+                        entries.append(AddressEntry(community=community, city=city.name, street=None, schedule=city))
+
+            for future in as_completed(street_futures):
+                community, city = street_futures[future]
+                for street in self._result(future, f"{community}/{city.name}"):
+                    entries.append(AddressEntry(community=community, city=city.name, street=street.name,
+                                                schedule=street))
+
+        entries.sort(key=lambda e: (e.community, e.city, e.street or ""))
+        logger.info(f"Zindeksowano {len(entries)} adresów z {len(communities)} gmin "
+                    f"w {time.perf_counter() - start:.1f}s ({len(self.failures)} błędów)")
+        return entries
+
+    @staticmethod
+    def schedule_urls(entries: list[AddressEntry]) -> set[str]:
+        return {url for e in entries for url in (e.inhabited, e.uninhabited) if url}
+
+    @staticmethod
+    def save_index(entries: list[AddressEntry], path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([asdict(e) for e in entries], f, ensure_ascii=False, indent=2)
+
+    def _fetch(self, method, *args):
+        self.throttle()
+        return method(*args)
+
+    def throttle(self):
+        """
+        Wspólny dla wszystkich wątków odstęp między zapytaniami do serwera.
+        """
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.delay
+        if wait > 0:
+            time.sleep(wait)
+
+    def _result(self, future, source):
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning(f"Nie udało się pobrać {source}: {e}")
+            self.failures.append((source, repr(e)))
+            return []
+        # pomijamy pusty element dodawany na potrzeby selectboxów
+        return [item for item in result or [] if item]
@@ -1,11 +1,12 @@
 import re
 from pathlib import Path
-
-import pandas as pd
-from pandas import DataFrame
+from typing import TYPE_CHECKING
 
 from garbage.services.FileService import FileService
 
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
 
 class CsvProcessing:
     TMP_SUBFOLDER = Path("csv")
@@ -19,17 +20,23 @@ class CsvProcessing:
         self.file_service.create_folder(self.dir)
 
     def process(self):
+        import pandas as pd
+
         headers: DataFrame = self._process_headers()
         data: DataFrame = self._read_data()
         full = pd.concat([headers, data])
-        full.to_csv(self.dir / self.OUTPUT_FILE_NAME, index=False, header=False, sep=";")
+        self.file_service.save_df_to_csv(self.dir / self.OUTPUT_FILE_NAME, full, index=False, header=False, sep=";")
         return self.dir / self.OUTPUT_FILE_NAME
 
     def _read_data(self):
+        import pandas as pd
+
         df: DataFrame = pd.read_csv(self.body_file, header=None, dtype=str)
         return df
 
     def _process_headers(self):
+        import pandas as pd
+
         df = pd.read_csv(self.headers_file, header=None)
         df_filled = df.fillna("").astype(str)
         aggr = df_filled.agg(' '.join, axis=0)
@@ -2,6 +2,8 @@ def first_empty_element(func):
     def wrapper(*args, **kwargs):
         result = func(*args, **kwargs)
         match result:
+            case []:
+                return [None]
             case list():
                 match result[0]:
                     case tuple():
@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from garbage.services.FileService import FileService
+from garbage.services.ResultCache import ResultCache
+from garbage.services.prewarm import INDEX_FILE, MANIFEST_FILE, cache_keys
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Feed:
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    last_modified: str
+    # (mtime_ns, rozmiar) pliku ICS – zmiana oznacza, że trzeba wczytać go ponownie
+    stamp: tuple[int, int]
+    name: str
+
+
+class FeedStore:
+    """
+    Rozwiązuje adres -> harmonogram -> plik ICS w ResultCache (na podstawie indeksu adresów
+    i manifestu z prewarm) i trzyma w pamięci gotowe odpowiedzi: treść, wersję gzip i ETag.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    KINDS = ("inhabited", "uninhabited")
+
+    def __init__(self, file_service: FileService, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache = ResultCache(file_service)
+        self.max_bytes = max_bytes
+        self._feeds: OrderedDict[str, Feed] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._json_files = {}
+
+    def feed_for_address(self, community, city, street=None, kind="inhabited", page=1) -> Feed | None:
+        urls = self._load_json(INDEX_FILE, self._build_address_index)
+        url = urls.get((self._normalize(community), self._normalize(city), self._normalize(street), kind))
+        if url is None:
+            return None
+        entry = self._load_json(MANIFEST_FILE).get(url)
+        keys = cache_keys(entry) if entry else []
+        if not 1 <= page <= len(keys):
+            return None
+        return self.feed_for_key(keys[page - 1])
+
+    def feed_for_key(self, key: str) -> Feed | None:
+        with self._lock:
+            feed = self._feeds.get(key)
+        if feed is not None:
+            path = self.cache.dir / key / feed.name
+            if self._file_stamp(path) == feed.stamp:
+                with self._lock:
+                    self._feeds.move_to_end(key)
+                return feed
+
+        # brak w pamięci albo plik się zmienił – wczytanie z ResultCache (odświeża też LRU na dysku)
+        entry = self.cache.lookup(key, ResultCache.ICS)
+        if entry is None:
+            return None
+        feed = self._load_feed(entry.file(ResultCache.ICS))
+        self._remember(key, feed)
+        return feed
+
+    def _load_feed(self, path: Path) -> Feed:
+        stamp = self._file_stamp(path)
+        body = path.read_bytes()
+        return Feed(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            last_modified=formatdate(stamp[0] / 1e9, usegmt=True),
+            stamp=stamp,
+            name=path.name,
+        )
+
+    def _remember(self, key, feed: Feed):
+        with self._lock:
+            previous = self._feeds.pop(key, None)
+            if previous is not None:
+                self._size -= self._feed_size(previous)
+            self._feeds[key] = feed
+            self._size += self._feed_size(feed)
+            while self._size > self.max_bytes and len(self._feeds) > 1:
+                _, evicted = self._feeds.popitem(last=False)
+                self._size -= self._feed_size(evicted)
+
+    def _load_json(self, file_name, transform=None):
+        """
+        Plik JSON z katalogu cache, wczytywany ponownie tylko po zmianie (np. po kolejnym prewarm).
+        """
+        path = self.cache.dir / file_name
+        stamp = self._file_stamp(path)
+        cached = self._json_files.get(file_name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if stamp is None:
+            data = {}
+        else:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        if transform is not None:
+            data = transform(data)
+        self._json_files[file_name] = (stamp, data)
+        return data
+
+    @classmethod
+    def _build_address_index(cls, entries) -> dict[tuple, str]:
+        urls = {}
+        for entry in entries:
+            address = (cls._normalize(entry["community"]), cls._normalize(entry["city"]),
+                       cls._normalize(entry["street"]))
+            for kind in cls.KINDS:
+                if entry["schedule"].get(kind):
+                    urls[(*address, kind)] = entry["schedule"][kind]
+        return urls
+
+    @staticmethod
+    def _normalize(value) -> str:
+        return " ".join((value or "").split()).lower()
+
+    @staticmethod
+    def _file_stamp(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _feed_size(feed: Feed) -> int:
+        return len(feed.body) + len(feed.gzip_body)
+
+
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /feed.ics?community=..&city=..&street=..&kind=inhabited&page=1 – kalendarz dla adresu
+    GET /calendar/<klucz cache>.ics – kalendarz wprost z ResultCache
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive dla klientów odpytujących wiele kalendarzy
+    # nagłówki i treść idą osobnymi zapisami – z algorytmem Nagle'a każda odpowiedź 200 czekałaby ~40 ms
+    disable_nagle_algorithm = True
+    server_version = "EkoRegionFeed/1.0"
+    MAX_AGE = 6 * 60 * 60
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        feed = self._resolve_feed()
+        if feed is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        # osobny ETag dla każdej reprezentacji (RFC 9110, 8.8.3)
+        etag = feed.etag[:-1] + '-gz"' if use_gzip else feed.etag
+        if self._etag_matches(feed.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag, feed.last_modified)
+            self.end_headers()
+            return
+
+        body = feed.gzip_body if use_gzip else feed.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/calendar; charset=utf-8")
+        self.send_header("Content-Disposition", f'inline; filename="{feed.name}"')
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag, feed.last_modified)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _resolve_feed(self) -> Feed | None:
+        store: FeedStore = self.server.store
+        url = urlsplit(self.path)
+        if url.path == "/feed.ics":
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            try:
+                page = int(query.get("page", 1))
+            except ValueError:
+                return None
+            return store.feed_for_address(query.get("community"), query.get("city"), query.get("street"),
+                                          query.get("kind", "inhabited"), page)
+        if url.path.startswith("/calendar/") and url.path.endswith(".ics"):
+            key = url.path[len("/calendar/"):-len(".ics")]
+            # klucz to skrót SHA-256 – nic innego nie może trafić do ścieżki pliku
+            if len(key) == 64 and all(c in "0123456789abcdef" for c in key):
+                return store.feed_for_key(key)
+        return None
+
+    def _etag_matches(self, etag) -> bool:
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        if header.strip() == "*":
+            return True
+        # porównanie słabe: W/ i wariant gzip wskazują tę samą treść
+        base = etag.strip('"')
+        for candidate in header.split(","):
+            candidate = candidate.strip().removeprefix("W/").strip('"').removesuffix("-gz")
+            if candidate == base:
+                return True
+        return False
+
+    def _send_cache_headers(self, etag, last_modified):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", f"public, max-age={self.MAX_AGE}")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class FeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, store: FeedStore):
+        super().__init__(server_address, FeedRequestHandler)
+        self.store = store
+
+
+def serve_feeds(base_dir, host="0.0.0.0", port=8080):
+    """
+    Serwer subskrypcji (webcal) kalendarzy z ResultCache; dane odświeża komenda prewarm.
+    """
+    server = FeedServer((host, port), FeedStore(FileService(base_dir)))
+    logger.info(f"Serwer kalendarzy nasłuchuje na http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
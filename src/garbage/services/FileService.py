@@ -1,27 +1,64 @@
 import csv
+import os
 import shutil
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import fitz
-from PIL import Image
-from icalendar import Calendar
+# fitz, PIL i icalendar importowane dopiero przy użyciu – FileService jest potrzebny wszędzie,
+# także tam, gdzie żadna z tych bibliotek nie jest używana (np. CLI csv, serwer kalendarzy)
+if TYPE_CHECKING:
+    from PIL import Image
+    from icalendar import Calendar
 
 class FileService:
 
     resources_dir = Path("resources")
     _temp_directory = resources_dir / Path("tmp")
+    JOBS_SUBFOLDER = Path("jobs")
 
 
-    def __init__(self, base_directory: Path):
+    def __init__(self, base_directory: Path, temporary_directory: Path | None = None):
         self.base_directory = base_directory
-        self.temporary_directory = base_directory / self._temp_directory
+        self.temporary_directory = temporary_directory or base_directory / self._temp_directory
         self.create_folder(self.temporary_directory)
 
-    def __del__(self):
-        #TODO: disable in debug mode
-        if False:
-            if self.temporary_directory.exists():
-                shutil.rmtree(self.temporary_directory)
+    @classmethod
+    def for_job(cls, base_directory: Path, job_id: str | None = None) -> "FileService":
+        """
+        FileService z własnym katalogiem plików pośrednich resources/tmp/jobs/<job_id>
+        (sesja web, plik wsadowy) – równoległe zadania nie nadpisują sobie plików.
+        Stare katalogi usuwa JobJanitor.
+        """
+        return cls(base_directory, cls.jobs_directory(base_directory) / (job_id or uuid.uuid4().hex))
+
+    @classmethod
+    def jobs_directory(cls, base_directory: Path) -> Path:
+        return Path(base_directory) / cls._temp_directory / cls.JOBS_SUBFOLDER
+
+    def remove_temporary_directory(self):
+        shutil.rmtree(self.temporary_directory, ignore_errors=True)
+
+    @contextmanager
+    def atomic_path(self, path):
+        """
+        Ścieżka pliku tymczasowego obok docelowego, po udanym zapisie podmienianego przez os.replace –
+        czytelnik (inna sesja, serwer kalendarzy) widzi starą albo kompletną nową wersję, nigdy połowę pliku.
+        """
+        path = Path(path)
+        temporary = path.with_name(f".{path.stem}.{uuid.uuid4().hex[:8]}{path.suffix}")
+        try:
+            yield temporary
+            os.replace(temporary, path)
+        finally:
+            temporary.unlink(missing_ok=True)
+
+    @contextmanager
+    def atomic_write(self, path, mode="wb", **kwargs):
+        with self.atomic_path(path) as temporary:
+            with open(temporary, mode, **kwargs) as f:
+                yield f
 
 
     def create_folder(self, folder_path: str | Path):
@@ -29,12 +66,19 @@ class FileService:
             folder_path = Path(folder_path)
         folder_path.mkdir(parents=True, exist_ok=True)
 
-    def save_ics(self, file_name, calendar: Calendar):
-        with open(file_name, "wb") as ics:
+    def save_ics(self, file_name, calendar: "Calendar"):
+        with self.atomic_write(file_name) as ics:
             ics.write(calendar.to_ical())
 
+    def open_ics(self, file_name):
+        return self.atomic_write(file_name)
+
+    def read_ics(self, file_name) -> bytes:
+        with open(file_name, "rb") as ics:
+            return ics.read()
+
     def save_csv(self, header, body, output_filename):
-        with open(output_filename, mode='w', encoding="utf-8", newline='') as file:
+        with self.atomic_write(output_filename, mode='w', encoding="utf-8", newline='') as file:
             writer = csv.writer(file, delimiter=";")
             writer.writerow(header)
             for row in body:
@@ -47,23 +91,33 @@ class FileService:
             return data
 
     def open_pdf(self, filename):
+        import fitz
+
         return fitz.open(filename)
 
     def open_image(self, filename):
+        from PIL import Image
+
         return Image.open(filename)
 
-    def save_image(self, filename, image: Image):
-        image.save(filename)
+    def save_image(self, filename, image: "Image.Image"):
+        with self.atomic_path(filename) as temporary:
+            image.save(temporary)
 
-    def save_df_to_csv(self, filename, df, index=False, header=False):
-        df.to_csv(filename, index=index, header=header)
+    def save_df_to_csv(self, filename, df, index=False, header=False, sep=","):
+        with self.atomic_write(filename, "w", encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=index, header=header, sep=sep)
 
     def save_file(self, path, data):
-        with open(path, "wb") as f:
+        with self.atomic_write(path) as f:
             f.write(data.getbuffer())
 
+    def copy_file(self, source, destination):
+        with self.atomic_path(destination) as temporary:
+            shutil.copyfile(source, temporary)
+
     def save_downloaded_file(self, path, data):
-        with open(path, "wb") as f:
+        with self.atomic_write(path) as f:
             for chunk in data.iter_content(chunk_size=8192):
                 if chunk:
                     f.write(chunk)
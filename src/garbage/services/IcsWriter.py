@@ -0,0 +1,143 @@
+import datetime
+from functools import lru_cache
+from typing import BinaryIO, Iterable
+
+
+class IcsWriter:
+    """
+    Strumieniowy zapis iCalendar (RFC 5545) bez budowania drzewa obiektów icalendar.
+    Każdy komponent trafia do strumienia (plik, gniazdo) od razu po zbudowaniu.
+    """
+
+    CRLF = b"\r\n"
+    MAX_LINE_OCTETS = 75
+    # SUMMARY, COLOR, adnotacje itp. powtarzają się między wydarzeniami
+    TEXT_CACHE_SIZE = 4096
+    # znaki specjalne w wartościach TEXT (RFC 5545, 3.3.11)
+    _TEXT_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"})
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def begin(self, component: str):
+        self.stream.write(b"BEGIN:" + component.encode() + self.CRLF)
+
+    def end(self, component: str):
+        self.stream.write(b"END:" + component.encode() + self.CRLF)
+
+    def write_properties(self, properties: Iterable[tuple[str, object]]):
+        self.stream.write(self.format_properties(properties))
+
+    def write_component(self, component: str, properties: Iterable[tuple[str, object]]):
+        """
+        Cały komponent (np. VEVENT) jednym zapisem do strumienia.
+        """
+        self.stream.write(b"BEGIN:" + component.encode() + self.CRLF
+                          + self.format_properties(properties)
+                          + b"END:" + component.encode() + self.CRLF)
+
+    def write_lines(self, component: str, lines: Iterable[str]):
+        """
+        Komponent z gotowych linii treści (np. odczytanych z poprzedniego pliku).
+        """
+        self.stream.write(b"BEGIN:" + component.encode() + self.CRLF
+                          + b"".join(self.fold(line) for line in lines)
+                          + b"END:" + component.encode() + self.CRLF)
+
+    @classmethod
+    def content_line(cls, name: str, value) -> str:
+        return f"{name}{cls.format_value(value)}"
+
+    @classmethod
+    def read_components(cls, data: bytes, component: str = "VEVENT") -> list[dict[str, str]]:
+        """
+        Prosty odczyt komponentów: nazwa właściwości -> reszta linii (parametry i wartość, np. ';VALUE=DATE:20250103').
+        """
+        text = data.decode("utf-8").replace("\r\n", "\n")
+        # rozwinięcie zawiniętych linii (RFC 5545, 3.1)
+        text = text.replace("\n ", "").replace("\n\t", "")
+        components = []
+        current = None
+        for line in text.split("\n"):
+            if line == f"BEGIN:{component}":
+                current = {}
+            elif line == f"END:{component}":
+                components.append(current)
+                current = None
+            elif current is not None and line:
+                split_at = min(i for i in (line.find(";"), line.find(":"), len(line)) if i >= 0)
+                current[line[:split_at].upper()] = line[split_at:]
+        return components
+
+    @classmethod
+    def format_properties(cls, properties: Iterable[tuple[str, object]]) -> bytes:
+        lines = []
+        for name, value in properties:
+            if value is None:
+                continue
+            if isinstance(value, str):
+                lines.append(cls.text_line(name, value))
+            else:
+                lines.append(cls.fold(f"{name}{cls.format_value(value)}"))
+        return b"".join(lines)
+
+    @staticmethod
+    @lru_cache(maxsize=TEXT_CACHE_SIZE)
+    def text_line(name: str, text: str) -> bytes:
+        return IcsWriter.fold(f"{name}:{IcsWriter.escape_text(text)}")
+
+    @classmethod
+    def format_value(cls, value) -> str:
+        """
+        Parametry i wartość właściwości, razem z dwukropkiem, np. ';VALUE=DATE:20250103'.
+        """
+        if isinstance(value, datetime.datetime):
+            suffix = ""
+            if value.tzinfo is not None:
+                value = value.astimezone(datetime.timezone.utc)
+                suffix = "Z"
+            # strftime jest kilkukrotnie wolniejsze przy setkach tysięcy wydarzeń
+            return (f":{value.year:04d}{value.month:02d}{value.day:02d}"
+                    f"T{value.hour:02d}{value.minute:02d}{value.second:02d}{suffix}")
+        if isinstance(value, datetime.date):
+            return f";VALUE=DATE:{cls._date(value)}"
+        if isinstance(value, (list, tuple)):
+            # lista dat, np. EXDATE / RDATE
+            return ";VALUE=DATE:" + ",".join(cls._date(d) for d in value)
+        if isinstance(value, dict):
+            # reguła powtarzania (RRULE), kolejność kluczy jak w icalendar: FREQ, UNTIL, INTERVAL
+            return ":" + ";".join(f"{key}={cls._date(v) if isinstance(v, datetime.date) else v}"
+                                  for key, v in value.items())
+        return ":" + cls.escape_text(str(value))
+
+    @staticmethod
+    def _date(value: datetime.date) -> str:
+        return f"{value.year:04d}{value.month:02d}{value.day:02d}"
+
+    @classmethod
+    def escape_text(cls, text: str) -> str:
+        return text.replace("\r\n", "\n").translate(cls._TEXT_ESCAPES)
+
+    @classmethod
+    def fold(cls, line: str) -> bytes:
+        """
+        Łamanie linii co 75 oktetów; kontynuacja zaczyna się spacją.
+        Nie dzielimy wielobajtowych znaków UTF-8 (np. 'ś').
+        """
+        data = line.encode("utf-8")
+        if len(data) <= cls.MAX_LINE_OCTETS:
+            return data + cls.CRLF
+
+        parts = []
+        start = 0
+        limit = cls.MAX_LINE_OCTETS
+        while start < len(data):
+            end = min(start + limit, len(data))
+            # cofamy się z bajtów kontynuacji (10xxxxxx) do początku znaku
+            while end < len(data) and data[end] & 0xC0 == 0x80:
+                end -= 1
+            parts.append(data[start:end])
+            start = end
+            # spacja na początku linii kontynuacji też się liczy
+            limit = cls.MAX_LINE_OCTETS - 1
+        return (cls.CRLF + b" ").join(parts) + cls.CRLF
@@ -1,9 +1,9 @@
 import logging
+import math
 from pathlib import Path
 
 import cv2
 import numpy as np
-from PIL import Image
 
 from garbage.services.FileService import FileService
 
@@ -14,46 +14,88 @@ class ImageProcessingService:
     CROPPED_IMAGE_NAME = "1. cropped_table.png"
     EMPTY_CELL_CHARACTER = "+"
     TMP_SUBFOLDER = Path("image")
-
-    def __init__(self, file_service: FileService, input_file):
+    RENDER_DPI = 300
+    # wyszukanie tabeli na podglądzie strony: rozdzielczość, próg jasności i zapas (pt) wokół znalezionego konturu
+    LOCATE_DPI = 72
+    LOCATE_THRESHOLD = 200
+    LOCATE_PADDING = 12
+
+    def __init__(self, file_service: FileService, input_file, debug_artifacts=False, save_preview=False,
+                 page_number=0):
+        """
+        page_number – numer strony PDF (od 0)
+        debug_artifacts – zapisuje obraz po każdym etapie do resources/tmp/image
+        save_preview – zapisuje tylko przyciętą tabelę (podgląd w aplikacji web)
+        Etapy przekazują sobie tablice NumPy, bez tych opcji nic nie trafia na dysk.
+        """
         self.file_service = file_service
         self.input_file = input_file
+        self.debug_artifacts = debug_artifacts
+        self.save_preview = save_preview
+        self.page_number = page_number
         self.dir = self.file_service.temporary_directory / self.TMP_SUBFOLDER
         self.file_service.create_folder(self.dir)
 
     def process_waste_pdf(self):
         cropped_image = self._crop_file(self.input_file)
-        redless_image = self._replace_red_black(self.dir / cropped_image)
-        colorless_image = self._eliminate_colours(self.dir / redless_image)
+        redless_image = self._replace_red_black(cropped_image)
+        colorless_image = self._eliminate_colours(redless_image)
+
+        filled_image = self._fill_empty_cells(colorless_image)
+        header, body = self._split_table_into_header_and_body(filled_image)
 
-        filled_image = self._fill_empty_cells(self.dir / colorless_image)
-        header, body = self._split_table_into_header_and_body(self.dir / filled_image)
+        return header, body
 
-        return self.dir / header, self.dir / body
+    def save_table_preview(self):
+        """
+        Zapisuje tylko przyciętą tabelę – podgląd dla CSV z cache, bez dalszych etapów.
+        """
+        self._crop_file(self.input_file)
 
-    def _crop_file(self, file_name) -> str:
+    def _save_artifact(self, file_name, image, force=False):
+        if self.debug_artifacts or force:
+            cv2.imwrite(self.dir / file_name, image)
+            logger.debug(f"✅ Zapisano obraz: {self.dir / file_name}")
+
+    def _crop_file(self, file_name):
         OUT_FILE = self.CROPPED_IMAGE_NAME
 
         # === 1. Otwórz PDF i wczytaj stronę ===
         doc = self.file_service.open_pdf(file_name)
-        page = doc.load_page(0)
+        page = doc.load_page(self.page_number)
+
+        # === 2. Zgrubne położenie tabeli na taniej kopii strony w niskiej rozdzielczości ===
+        clip = self._locate_table(page)
 
-        # Tworzymy pixmap z wysoką rozdzielczością
-        pix = page.get_pixmap(dpi=300)
+        # === 3. W wysokiej rozdzielczości renderujemy tylko obszar tabeli (cała strona A4 w 300 DPI to ~26 MB) ===
+        img_bgr = self._render(page, clip)
 
-        # === 2. Zamiana pixmap na numpy array ===
-        # Sprawdzenie czy jest kanał alfa
-        if pix.alpha:
-            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 4)
-            # Konwersja RGBA -> RGB (usuwa alfa)
-            img = cv2.cvtColor(img, cv2.COLOR_RGBA2RGB)
-        else:
-            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+        # === 4. Wykrywanie linii tabeli (dokładne, w wycinku) ===
+        x, y, w, h = self._table_rect(img_bgr)
+        if clip is not None and (x == 0 or y == 0 or x + w >= img_bgr.shape[1] or y + h >= img_bgr.shape[0]):
+            # kontur dotyka krawędzi wycinka – tabela mogła zostać ucięta, wracamy do całej strony
+            logger.debug("Tabela wychodzi poza wycinek, renderuję całą stronę.")
+            img_bgr = self._render(page, None)
+            x, y, w, h = self._table_rect(img_bgr)
+        doc.close()
 
+        # === 5. Przycinanie obrazu do tabeli ===
+        MARGIN = 5
+        cropped_bgr = img_bgr[max(y - MARGIN, 0):y + h + MARGIN, max(x - MARGIN, 0):x + w + MARGIN]
+
+        # === 6. Zapis przyciętego obrazu ===
+        self._save_artifact(OUT_FILE, cropped_bgr, force=self.save_preview)
+
+        return cropped_bgr
+
+    def _render(self, page, clip):
+        pix = page.get_pixmap(dpi=self.RENDER_DPI, clip=clip, alpha=False)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
         # Konwersja do BGR dla OpenCV
-        img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
 
-        # === 3. Wykrywanie linii tabeli ===
+    @staticmethod
+    def _table_rect(img_bgr):
         gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
         _, thresh = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY_INV)
 
@@ -63,50 +105,80 @@ class ImageProcessingService:
             raise ValueError("Nie znaleziono żadnych konturów w obrazie PDF.")
 
         # Wybieramy największy kontur (domniemana tabela)
-        c = max(contours, key=cv2.contourArea)
-        x, y, w, h = cv2.boundingRect(c)
+        return cv2.boundingRect(max(contours, key=cv2.contourArea))
 
-        # === 4. Przycinanie obrazu do tabeli ===
-        MARGIN = 5
-        cropped_bgr = img_bgr[y-MARGIN:y+h+MARGIN, x-MARGIN:x+w+MARGIN]
+    def _locate_table(self, page):
+        """
+        Obszar strony (w punktach PDF) z największym konturem, wyznaczony na renderze w LOCATE_DPI,
+        z zapasem LOCATE_PADDING i wyrównany do siatki pikseli RENDER_DPI – wycinek w 300 DPI
+        ma wtedy te same piksele co odpowiedni fragment całej strony.
+        None (cała strona), gdy w niskiej rozdzielczości nic nie widać.
+        """
+        import fitz
 
-        # === 5. Zapis przyciętego obrazu ===
-        cv2.imwrite(self.dir / OUT_FILE, cropped_bgr)
-        logger.debug(f"✅ Zapisano przyciętą tabelę do: {self.dir / OUT_FILE}")
+        pix = page.get_pixmap(dpi=self.LOCATE_DPI, colorspace=fitz.csGRAY, alpha=False)
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+        # cienkie linie siatki są w niskiej rozdzielczości szare (antyaliasing), stąd wyższy próg
+        _, thresh = cv2.threshold(gray, self.LOCATE_THRESHOLD, 255, cv2.THRESH_BINARY_INV)
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
 
-        return OUT_FILE
+        x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+        scale = 72 / self.LOCATE_DPI
+        pad = self.LOCATE_PADDING
+        clip = fitz.Rect(page.rect.x0 + x * scale - pad, page.rect.y0 + y * scale - pad,
+                         page.rect.x0 + (x + w) * scale + pad, page.rect.y0 + (y + h) * scale + pad) & page.rect
 
-    def _replace_red_black(self, file_name, sensitivity=0.5):
+        step = 72 / self.RENDER_DPI
+        return fitz.Rect(math.floor(clip.x0 / step) * step, math.floor(clip.y0 / step) * step,
+                         math.ceil(clip.x1 / step) * step, math.ceil(clip.y1 / step) * step)
+
+    def _replace_red_black(self, image, sensitivity=0.5):
         """
         sensitivity – zakres 0.1–1.0
         większa wartość = większa tolerancja na różne odcienie czerwieni
         """
-
-        import colorsys
         OUT_FILE = "2. redless.png"
-        img = Image.open(file_name).convert("RGB")
-        pixels = img.load()
+        img = image.copy()
 
+        img[self._red_mask(img, sensitivity)] = (0, 0, 0)
+
+        self._save_artifact(OUT_FILE, img)
+        return img
+
+    @staticmethod
+    def _red_mask(img_bgr, sensitivity):
+        """
+        Maska pikseli czerwonych liczona na całej tablicy naraz.
+        Odwzorowuje colorsys.rgb_to_hsv (float64), więc wynik jest identyczny
+        z dawną pętlą po pikselach.
+        """
         # ustawienia zależne od czułości
         hue_range = 0.03 + sensitivity * 0.07   # szerokość stożka czerwieni
         min_saturation = 0.2 - sensitivity * 0.15  # dopuszczalna saturacja
 
-        for i in range(img.width):
-            for j in range(img.height):
-                r, g, b = pixels[i, j]
-                h, s, v = colorsys.rgb_to_hsv(r/255, g/255, b/255)
+        b, g, r = (img_bgr[..., c] / 255 for c in range(3))
+        maxc = np.maximum(np.maximum(r, g), b)
+        minc = np.minimum(np.minimum(r, g), b)
+        rangec = maxc - minc
+        chromatic = rangec > 0
 
-                # czerwony jest przy H ≈ 0 (i ≈1), więc bierzemy oba końce skali
-                if (h < hue_range or h > 1 - hue_range) and s > min_saturation:
-                    pixels[i, j] = (0, 0, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = np.where(chromatic, rangec / maxc, 0.0)
+            rc = (maxc - r) / rangec
+            gc = (maxc - g) / rangec
+            bc = (maxc - b) / rangec
 
-        img.save(self.dir / OUT_FILE)
-        return OUT_FILE
+        h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+        h = np.where(chromatic, np.mod(h / 6.0, 1.0), 0.0)
 
-    def _eliminate_colours(self, file_name):
+        # czerwony jest przy H ≈ 0 (i ≈1), więc bierzemy oba końce skali
+        return ((h < hue_range) | (h > 1 - hue_range)) & (s > min_saturation)
+
+    def _eliminate_colours(self, image):
         OUT_FILE = "3. colorless.png"
 
-        image = cv2.imread(file_name)
         output = image.copy()
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
@@ -166,14 +238,13 @@ class ImageProcessingService:
             output[y:y+h, x:x+w] = cell
 
         # Zapisz wynik
-        cv2.imwrite(self.dir / OUT_FILE, output)
+        self._save_artifact(OUT_FILE, output)
 
-        return OUT_FILE
+        return output
 
 
-    def _all_black(self, file_name):
+    def _all_black(self, img):
         OUT_FILE = "2. black.png"
-        img = cv2.imread(file_name)
 
         # 1️⃣ Zamiana na skalę szarości
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -195,15 +266,14 @@ class ImageProcessingService:
         result[text_mask > 0] = img[text_mask > 0]
 
         # 5️⃣ Zapis wyniku
-        cv2.imwrite(self.dir / OUT_FILE, result)
-        return OUT_FILE
+        self._save_artifact(OUT_FILE, result)
+        return result
 
-    def _fill_empty_cells(self, file_name):
+    def _fill_empty_cells(self, image):
         OUT_FILE = "4. filled_image.png"
         OUT_DEBUG = "4. obraz_kontury.png"
 
-        # Wczytaj obraz
-        img = cv2.imread(file_name)
+        img = image.copy()
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
         # Inwersja (bo linie są ciemne)
@@ -230,7 +300,7 @@ class ImageProcessingService:
         # --- 2️⃣ Znajdź kontury (czyli komórki) ---
         contours, _ = cv2.findContours(grid, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
 
-        debug = img.copy()
+        debug = img.copy() if self.debug_artifacts else None
 
         for cnt in contours:
             x, y, w, h = cv2.boundingRect(cnt)
@@ -253,17 +323,19 @@ class ImageProcessingService:
                 tx = int(cx - text_size[0] / 2)
                 ty = int(cy + text_size[1] / 2)
                 cv2.putText(img, self.EMPTY_CELL_CHARACTER, (tx, ty), font, font_scale, (0, 0, 0), thickness, cv2.LINE_AA)
-                cv2.rectangle(debug, (x, y), (x + w, y + h), (0, 255, 0), 2)  # zielony = pusta komórka
-            else:
+                if debug is not None:
+                    cv2.rectangle(debug, (x, y), (x + w, y + h), (0, 255, 0), 2)  # zielony = pusta komórka
+            elif debug is not None:
                 cv2.rectangle(debug, (x, y), (x + w, y + h), (0, 0, 255), 1)  # czerwony = zawiera tekst
 
         # --- 3️⃣ Zapisz wyniki ---
-        cv2.imwrite(self.dir / OUT_FILE, img)
-        cv2.imwrite(self.dir / OUT_DEBUG, debug)
+        self._save_artifact(OUT_FILE, img)
+        if debug is not None:
+            self._save_artifact(OUT_DEBUG, debug)
 
-        return OUT_FILE
+        return img
 
-    def _split_table_into_header_and_body(self, input_path):
+    def _split_table_into_header_and_body(self, image):
         """
         Dzieli obraz tabeli na:
           - nagłówek (pierwszy wiersz),
@@ -273,8 +345,8 @@ class ImageProcessingService:
         HEADER_FILE = "5. headers.png"
         BODY_FILE = "5. data.png"
 
-        # Wczytaj obraz (w odcieniach szarości)
-        img = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
+        # Obraz w odcieniach szarości
+        img = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
         # Odwrócenie kolorów, żeby linie były białe
         inverted = cv2.bitwise_not(img)
@@ -296,15 +368,7 @@ class ImageProcessingService:
             raise ValueError("Nie udało się wykryć dwóch linii poziomych — sprawdź jakość obrazu.")
 
         # --- 2️⃣ Grupowanie zbliżonych linii w jedną ---
-        grouped_lines = []
-        current = [line_positions[0]]
-        for y in line_positions[1:]:
-            if y - current[-1] > 5:  # przerwa > 5 px => nowa linia
-                grouped_lines.append(int(np.mean(current)))
-                current = [y]
-            else:
-                current.append(y)
-        grouped_lines.append(int(np.mean(current)))
+        grouped_lines = self._group_line_positions(line_positions)
 
         # Teraz powinniśmy mieć listę linii poziomych (od góry do dołu)
         y_top = grouped_lines[0]           # pierwsza linia (góra tabeli)
@@ -315,9 +379,41 @@ class ImageProcessingService:
         body = img[y_header_bottom-5:, :]
 
         # --- 4️⃣ Zapisz wyniki ---
-        header_output = self.dir / HEADER_FILE
-        body_output = self.dir / BODY_FILE
-        cv2.imwrite(header_output, header)
-        cv2.imwrite(body_output, body)
+        self._save_artifact(HEADER_FILE, header)
+        self._save_artifact(BODY_FILE, body)
+
+        return header, body
 
-        return header_output, body_output
+    @staticmethod
+    def _group_line_positions(positions, gap=5):
+        """
+        Łączy sąsiednie pozycje pikseli w jedną linię (przerwa > gap px => nowa linia).
+        """
+        if len(positions) == 0:
+            return []
+        splits = np.where(np.diff(positions) > gap)[0] + 1
+        return [int(np.mean(group)) for group in np.split(positions, splits)]
+
+    @classmethod
+    def detect_grid_lines(cls, gray):
+        """
+        Zwraca pozycje linii tabeli (y linii poziomych, x linii pionowych)
+        dla obrazu w skali szarości.
+        """
+        # linie ciemne -> białe na czarnym tle
+        _, binary = cv2.threshold(cv2.bitwise_not(gray), 128, 255, cv2.THRESH_BINARY)
+        height, width = binary.shape
+
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(width // 4, 1), 1))
+        horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(height // 4, 1)))
+        vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
+
+        y_profile = np.sum(horizontal_lines, axis=1, dtype=np.int64)
+        x_profile = np.sum(vertical_lines, axis=0, dtype=np.int64)
+        if not y_profile.any() or not x_profile.any():
+            return [], []
+
+        ys = cls._group_line_positions(np.where(y_profile > y_profile.max() * 0.3)[0])
+        xs = cls._group_line_positions(np.where(x_profile > x_profile.max() * 0.3)[0])
+        return ys, xs
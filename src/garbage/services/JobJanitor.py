@@ -0,0 +1,95 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from garbage.services.FileService import FileService
+
+logger = logging.getLogger(__name__)
+
+
+class JobJanitor:
+    """
+    Sprząta katalogi zadań (FileService.for_job): usuwa starsze niż MAX_AGE, a gdy razem
+    przekraczają max_bytes – kolejne od najdawniej używanych. Katalogi używane w ciągu
+    ostatnich MIN_AGE sekund (trwające sesje, OCR w toku) nie są ruszane.
+    """
+
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+    MAX_AGE = 24 * 60 * 60
+    MIN_AGE = 60 * 60
+    # sprzątanie przy każdej nowej sesji to zbędne przechodzenie drzewa katalogów
+    SWEEP_INTERVAL = 5 * 60
+
+    _lock = threading.Lock()
+    _last_sweep = 0.0
+
+    def __init__(self, base_directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.dir = FileService.jobs_directory(base_directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def touch(file_service: FileService):
+        """
+        Oznacza katalog zadania jako używany (chroni go przez MIN_AGE).
+        """
+        os.utime(file_service.temporary_directory)
+
+    def sweep_if_due(self, keep=()) -> int:
+        with self._lock:
+            if time.monotonic() - JobJanitor._last_sweep < self.SWEEP_INTERVAL:
+                return 0
+            JobJanitor._last_sweep = time.monotonic()
+        return self.sweep(keep)
+
+    def sweep(self, keep=()) -> int:
+        """
+        keep – nazwy katalogów (id zadań), których nie wolno usunąć. Zwraca liczbę usuniętych katalogów.
+        """
+        if not self.dir.exists():
+            return 0
+        now = time.time()
+        entries = []
+        total = 0
+        for job_dir in self.dir.iterdir():
+            if job_dir.is_dir():
+                last_used, size = self._usage(job_dir)
+                entries.append((last_used, size, job_dir))
+                total += size
+
+        removed = 0
+        for last_used, size, job_dir in sorted(entries):
+            age = now - last_used
+            if age < self.MIN_AGE:
+                break
+            if job_dir.name in keep or (total <= self.max_bytes and age < self.MAX_AGE):
+                continue
+            shutil.rmtree(job_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        if total > self.max_bytes:
+            logger.warning(f"Katalogi zadań zajmują {total / 2**20:.0f} MB (limit {self.max_bytes / 2**20:.0f} MB), "
+                           f"ale wszystkie są w użyciu")
+        if removed:
+            logger.info(f"Usunięto {removed} katalogów zadań, zostało {total / 2**20:.0f} MB")
+        return removed
+
+    @staticmethod
+    def _usage(job_dir: Path) -> tuple[float, int]:
+        """
+        (czas ostatniego użycia, rozmiar) – najnowszy mtime katalogu i plików w nim.
+        """
+        last_used = job_dir.stat().st_mtime
+        size = 0
+        for root, _, files in os.walk(job_dir):
+            for name in files:
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                size += stat.st_size
+                last_used = max(last_used, stat.st_mtime)
+        return last_used, size
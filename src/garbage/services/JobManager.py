@@ -0,0 +1,248 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from garbage.services.batch import create_worker_pool
+from garbage.services.process import CSV_STAGES
+
+logger = logging.getLogger(__name__)
+
+
+class JobRejected(Exception):
+    """Wszystkie miejsca na zadania OCR są zajęte – spróbuj ponownie za chwilę."""
+
+
+@dataclass
+class OcrJob:
+    id: str
+    pdf_path: str
+    page_number: int
+    temporary_directory: str | None = None
+    # zadanie strony wielostronicowego PDF: od razu ICS zamiast CSV do edycji
+    calendar_path: str | None = None
+    calendar_id: str | None = None
+    status: str = "queued"  # queued, running, done, error, cancelled
+    stage: str | None = None
+    year: int | None = None
+    output: str | None = None
+    error: str | None = None
+    submitted: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        if self.stage not in CSV_STAGES:
+            return 0.0
+        return list(CSV_STAGES).index(self.stage) / len(CSV_STAGES)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class JobManager:
+    """
+    Kolejka zadań OCR aplikacji web: pula procesów (każdy z własnym Readerem EasyOCR)
+    o rozmiarze dobranym do rdzeni i pamięci kontenera, postęp etapów przez słownik
+    współdzielony z procesami i ograniczona liczba oczekujących zadań.
+    """
+
+    # szacowane zużycie pamięci jednego procesu OCR (torch + model EasyOCR + obrazy strony)
+    JOB_MEMORY_MB = 1500
+    # pamięć zostawiona dla samego serwera Streamlit
+    RESERVED_MEMORY_MB = 1024
+    # ile zadań może czekać w kolejce na każdy proces
+    QUEUED_PER_WORKER = 2
+    # po tylu sekundach zakończone zadania są zapominane
+    FINISHED_TTL = 60 * 60
+
+    def __init__(self, base_dir, workers=None, max_queued=None):
+        self.base_dir = base_dir
+        self.workers = workers or self.default_workers()
+        self.max_jobs = self.workers + (max_queued if max_queued is not None
+                                        else self.workers * self.QUEUED_PER_WORKER)
+        self._jobs: dict[str, OcrJob] = {}
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # etap zgłaszany przez proces roboczy: id zadania -> nazwa etapu
+        self._manager = multiprocessing.get_context("spawn").Manager()
+        self._stages = self._manager.dict()
+        self._pool = create_worker_pool(base_dir, self.workers)
+        logger.info(f"Kolejka OCR: {self.workers} procesów, maks. {self.max_jobs} zadań naraz")
+
+    @classmethod
+    def default_workers(cls) -> int:
+        workers = available_cpus()
+        memory_mb = available_memory_mb()
+        if memory_mb is not None:
+            workers = min(workers, (memory_mb - cls.RESERVED_MEMORY_MB) // cls.JOB_MEMORY_MB)
+        return max(1, workers)
+
+    def warm_up(self):
+        """
+        Uruchamia od razu wszystkie procesy, by Reader EasyOCR ładował się w tle przed pierwszym zadaniem.
+        """
+        for _ in range(self.workers):
+            self._pool.submit(_noop)
+
+    def submit(self, pdf_path, page_number=0, temporary_directory=None, calendar_path=None, calendar_id=None) -> str:
+        """
+        temporary_directory – katalog zadania (FileService.for_job), do którego trafi CSV i podgląd tabeli
+        calendar_path – zamiast CSV do edycji zapisuje od razu kalendarz ICS (ścieżka w OcrJob.output)
+        calendar_id – identyfikator harmonogramu w UID kalendarza (jak w process_schedule)
+        """
+        with self._lock:
+            self._prune()
+            active = sum(1 for job in self._jobs.values() if job.active)
+            if active >= self.max_jobs:
+                raise JobRejected(f"Serwer przetwarza już {active} harmonogramów, spróbuj ponownie za chwilę.")
+
+            job = OcrJob(id=uuid.uuid4().hex, pdf_path=str(pdf_path), page_number=page_number,
+                         temporary_directory=str(temporary_directory) if temporary_directory else None,
+                         calendar_path=str(calendar_path) if calendar_path else None, calendar_id=calendar_id)
+            future = self._submit_to_pool(job)
+            self._jobs[job.id] = job
+            self._futures[job.id] = future
+        future.add_done_callback(lambda f, job_id=job.id: self._finish(job_id, f))
+        logger.info(f"Zadanie OCR {job.id}: {pdf_path} (strona {page_number + 1})")
+        return job.id
+
+    def status(self, job_id) -> OcrJob | None:
+        """
+        Kopia stanu zadania (bezpieczna do odczytu w wątku sesji).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.active:
+                stage = self._stages.get(job_id)
+                if stage is not None:
+                    job.status, job.stage = "running", stage
+            return replace(job)
+
+    def queue_position(self, job_id) -> int:
+        """
+        Liczba zadań zgłoszonych wcześniej, które jeszcze nie ruszyły.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return 0
+            return sum(1 for other in self._jobs.values()
+                       if other.status == "queued" and other.submitted < job.submitted
+                       and other.id not in self._stages)
+
+    def cancel(self, job_id):
+        """
+        Anuluje zadanie czekające w kolejce; rozpoczęte OCR dobiega końca, a wynik jest pomijany.
+        """
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            logger.info(f"Zadanie OCR {job_id} anulowane")
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+        self._manager.shutdown()
+
+    def _submit_to_pool(self, job: OcrJob) -> Future:
+        try:
+            return self._pool.submit(_run_job, self.base_dir, job, self._stages)
+        except BrokenProcessPool:
+            # proces roboczy zginął (np. OOM killer) – pula nie przyjmie już zadań, tworzymy nową
+            logger.warning("Pula procesów OCR uszkodzona, tworzę nową")
+            self._pool = create_worker_pool(self.base_dir, self.workers)
+            return self._pool.submit(_run_job, self.base_dir, job, self._stages)
+
+    def _finish(self, job_id, future: Future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._stages.pop(job_id, None)
+            self._futures.pop(job_id, None)
+            if job is None:
+                return
+            job.finished = time.monotonic()
+            if future.cancelled():
+                job.status = "cancelled"
+            elif future.exception() is not None:
+                job.status, job.error = "error", repr(future.exception())
+                logger.error(f"Zadanie OCR {job_id} zakończone błędem: {job.error}")
+            else:
+                job.status = "done"
+                if job.calendar_path:
+                    job.output = str(future.result())
+                else:
+                    job.year = future.result()
+                logger.info(f"Zadanie OCR {job_id} zakończone ({job.finished - job.submitted:.1f}s)")
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and now - job.finished > self.FINISHED_TTL]:
+            del self._jobs[job_id]
+
+
+def available_cpus() -> int:
+    """
+    Rdzenie dostępne dla procesu: maska CPU i limit CPU z cgroup (v2 cpu.max, v1 cfs_quota).
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = _read_cgroup("cpu.max") or ""
+    parts = quota.split()
+    if len(parts) == 2 and parts[0] != "max":
+        return max(1, min(cpus, int(parts[0]) // int(parts[1])))
+    quota, period = _read_cgroup("cpu/cpu.cfs_quota_us"), _read_cgroup("cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return max(1, min(cpus, int(quota) // int(period)))
+    return cpus
+
+
+def available_memory_mb() -> int | None:
+    """
+    Limit pamięci kontenera z cgroup (v2 memory.max, v1 limit_in_bytes), inaczej pamięć fizyczna.
+    """
+    for name in ("memory.max", "memory/memory.limit_in_bytes"):
+        limit = _read_cgroup(name)
+        # brak limitu: "max" (v2) albo ogromna liczba (v1)
+        if limit and limit.isdigit() and int(limit) < 1 << 60:
+            return int(limit) // (1024 * 1024)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _read_cgroup(name) -> str | None:
+    try:
+        return (Path("/sys/fs/cgroup") / name).read_text().strip()
+    except OSError:
+        return None
+
+
+def _noop():
+    return None
+
+
+def _run_job(base_dir, job: OcrJob, stages):
+    from garbage.services.process import process_schedule, process_schedule_to_csv
+
+    def report(stage):
+        stages[job.id] = stage
+
+    report(next(iter(CSV_STAGES)))
+    temporary_directory = Path(job.temporary_directory) if job.temporary_directory else None
+    if job.calendar_path:
+        return process_schedule(base_dir, Path(job.pdf_path), page_number=job.page_number, progress=report,
+                                temporary_directory=temporary_directory, calendar_path=Path(job.calendar_path),
+                                streaming=True, calendar_id=job.calendar_id)
+    return process_schedule_to_csv(base_dir, Path(job.pdf_path), page_number=job.page_number, progress=report,
+                                   temporary_directory=temporary_directory)
@@ -0,0 +1,96 @@
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class LookupCache:
+    """
+    Trwały (SQLite) cache odpowiedzi z eko-region.pl wspólny dla wszystkich sesji i procesów.
+    Wpis po upływie TTL jest nadal zwracany, a w tle pobierana jest świeża wersja
+    (stale-while-revalidate), więc listy wyboru nie czekają na sieć.
+    """
+
+    DB_FILE = "lookup_cache.sqlite3"
+    DEFAULT_TTL = 24 * 60 * 60
+    REFRESH_WORKERS = 2
+
+    def __init__(self, db_path: Path, ttl: int = DEFAULT_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.REFRESH_WORKERS, thread_name_prefix="lookup-refresh")
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS lookup ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        connection.commit()
+
+    def get(self, key: str, fetch, ttl: int | None = None):
+        """
+        Zwraca wartość z cache; przy braku wpisu pobiera ją przez fetch() synchronicznie,
+        przy przeterminowanym wpisie zwraca starą wartość i odświeża ją w tle.
+        """
+        row = self._connection().execute("SELECT value, expires_at FROM lookup WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            logger.debug(f"Lookup cache miss: {key}")
+            value = fetch()
+            self._put(key, value, ttl)
+            return value
+
+        value, expires_at = row
+        if expires_at < time.time():
+            logger.debug(f"Lookup cache stale: {key}")
+            self._refresh_in_background(key, fetch, ttl)
+        return pickle.loads(value)
+
+    def invalidate(self, key: str):
+        connection = self._connection()
+        connection.execute("DELETE FROM lookup WHERE key = ?", (key,))
+        connection.commit()
+
+    def _put(self, key, value, ttl=None):
+        # nie zapisujemy nieudanych odpowiedzi
+        if value is None:
+            return
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO lookup (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value), time.time() + (ttl or self.ttl)),
+        )
+        connection.commit()
+
+    def _refresh_in_background(self, key, fetch, ttl):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, fetch, ttl)
+
+    def _refresh(self, key, fetch, ttl):
+        try:
+            self._put(key, fetch(), ttl)
+            logger.debug(f"Lookup cache odświeżony: {key}")
+        except Exception as e:
+            logger.warning(f"Nie udało się odświeżyć {key}, zostaje poprzednia wartość: {e}")
+        finally:
+            with self._refreshing_lock:
+                self._refreshing.discard(key)
+
+    def _connection(self) -> sqlite3.Connection:
+        # połączenie SQLite na wątek
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=10)
+            self._local.connection = connection
+        return connection
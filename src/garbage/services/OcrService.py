@@ -1,13 +1,16 @@
 import logging
-import re
+import threading
+import time
 from pathlib import Path
 
 import cv2
-import easyocr
 import numpy as np
 import pandas as pd
 
+from garbage.services.CellParser import fix_ocr_text
 from garbage.services.FileService import FileService
+from garbage.services.ImageProcessingService import ImageProcessingService
+from garbage.services.TableLayout import TableLayout
 
 logger = logging.getLogger(__name__)
 
@@ -18,300 +21,210 @@ class OcrService:
     LANGS = ['pl']
     TOLERANCE_Y = 25          # grupowanie wierszy
     TOLERANCE_X_GROUP = 60    # grupowanie kolumn
-    CELL_VERTICAL_MERGE = 20  # odległość (px) w pionie dla łączenia tekstów w tej samej komórce
+    BODY_TOLERANCE_Y = 35     # grupowanie wierszy danych (po dolnej krawędzi tekstu)
+    BODY_TOLERANCE_X_GROUP = 80  # grupowanie kolumn danych
+    CELL_PADDING = 4          # margines (px) odcinany od linii siatki przy wycinaniu komórki
+    MIN_LINE_HEIGHT = 6       # minimalna wysokość (px) pasa tekstu w komórce
+    LINE_GAP = 3              # przerwa (px) w pionie oddzielająca wiersze tekstu w komórce
 
     HEADER_OUTPUT = "header_harmonogram.csv"
     DATA_OUTPUT = "data_harmonogram.csv"
 
-    def __init__(self, file_service: FileService, headers_file, data_file) -> None:
+    # jeden Reader na proces, współdzielony przez wszystkie instancje (CLI, sesje Streamlit)
+    _reader = None
+    _reader_lock = threading.Lock()
+    _inference_lock = threading.Lock()
+    reader_startup_seconds = None
+
+    def __init__(self, file_service: FileService, headers_image, data_image, cell_mode=False) -> None:
+        """
+        headers_image, data_image – ścieżka do pliku lub obraz (tablica NumPy)
+        cell_mode – dane odczytywane komórka po komórce z siatki tabeli, bez detektora tekstu
+        """
         pd.set_option('display.max_columns', None)
         self.file_service = file_service
-        self.headers_file = headers_file
-        self.data_file = data_file
+        self.headers_image = headers_image
+        self.data_image = data_image
+        self.cell_mode = cell_mode
         self.dir = self.file_service.temporary_directory / self.TMP_SUBFOLDER
         self.file_service.create_folder(self.dir)
-        self.model_path = self.file_service.base_directory / self.file_service.resources_dir / self.MODEL_SUBFOLDER
-        self._check_models()
+        self.model_path = self.model_path_for(self.file_service)
+        self.reader = self.get_reader(self.file_service)
+        self.timings = {}
 
+    @classmethod
+    def model_path_for(cls, file_service: FileService) -> Path:
+        return file_service.base_directory / file_service.resources_dir / cls.MODEL_SUBFOLDER
 
-    def _check_models(self):
-        if not self.file_service.path_exists(self.model_path) or not self.file_service.list_dir(self.model_path):
+    @classmethod
+    def get_reader(cls, file_service: FileService):
+        """
+        Zwraca współdzielony easyocr.Reader, tworząc go i rozgrzewając przy pierwszym użyciu.
+        """
+        with cls._reader_lock:
+            if cls._reader is None:
+                cls._reader = cls._create_reader(file_service)
+        return cls._reader
+
+    @classmethod
+    def _create_reader(cls, file_service: FileService):
+        model_path = cls.model_path_for(file_service)
+        if not file_service.path_exists(model_path) or not file_service.list_dir(model_path):
             logger.info("Modele EasyOCR nie istnieją, pobieram...")
         else:
             logger.info("Modele EasyOCR już są, używam ich z cache")
-        self.reader = easyocr.Reader(self.LANGS, gpu=False, model_storage_directory=self.model_path)
+
+        # easyocr ciągnie torcha (kilka sekund importu) – ładowany dopiero, gdy OCR faktycznie rusza
+        import easyocr
+
+        start = time.perf_counter()
+        reader = easyocr.Reader(cls.LANGS, gpu=False, model_storage_directory=model_path)
+        # rozgrzewka – pierwsze wywołanie inicjalizuje leniwe struktury torcha
+        reader.readtext(np.full((64, 256), 255, dtype=np.uint8))
+        cls.reader_startup_seconds = time.perf_counter() - start
+        logger.info(f"EasyOCR gotowy w {cls.reader_startup_seconds:.2f}s")
+        return reader
+
+    def _readtext(self, img, **kwargs):
+        # easyocr/torch nie gwarantują bezpieczeństwa wątków na jednym Readerze
+        with self._inference_lock:
+            return self.reader.readtext(img, **kwargs)
 
     def process(self):
-        self.ocr(self.headers_file, self.HEADER_OUTPUT)
-        self.process_table_image(self.data_file, self.DATA_OUTPUT, 35, 80, 25)
-        return self.dir/ self.HEADER_OUTPUT, self.dir / self.DATA_OUTPUT
+        start = time.perf_counter()
+        self.ocr(self.headers_image, self.HEADER_OUTPUT)
+        self.timings["header"] = time.perf_counter() - start
 
-    def ocr(self, file_path, output_file_path):
-        # ====== Wczytanie i OCR ======
-        img = cv2.imread(file_path)
-        results = self.reader.readtext(img)
+        start = time.perf_counter()
+        if self.cell_mode:
+            self.process_table_cells(self.data_image, self.DATA_OUTPUT)
+        else:
+            self.process_table_image(self.data_image, self.DATA_OUTPUT, self.BODY_TOLERANCE_Y,
+                                     self.BODY_TOLERANCE_X_GROUP)
+        self.timings["body"] = time.perf_counter() - start
 
-        # ====== Tworzenie listy elementów ======
-        elements = []
-        for bbox, text, conf in results:
-            if not text:
-                continue
-            x_coords = [p[0] for p in bbox]
-            y_coords = [p[1] for p in bbox]
-            cx, cy = np.mean(x_coords), np.mean(y_coords)
-            elements.append({'text': text.strip(), 'x': cx, 'y': cy, 'bbox': bbox})
-
-        # ====== Sortowanie po Y ======
-        elements.sort(key=lambda e: e['y'])
-
-        # ====== Grupowanie wierszy ======
-        rows, current_row, last_y = [], [], None
-        for el in elements:
-            if last_y is None or abs(el['y'] - last_y) < self.TOLERANCE_Y:
-                current_row.append(el)
-            else:
-                rows.append(current_row)
-                current_row = [el]
-            last_y = el['y']
-        if current_row:
-            rows.append(current_row)
-
-        # ====== Wykrywanie kolumn ======
-        all_x = sorted([e['x'] for e in elements])
-        col_groups = []
-        cur = [all_x[0]]
-        for x in all_x[1:]:
-            if abs(x - cur[-1]) < self.TOLERANCE_X_GROUP:
-                cur.append(x)
-            else:
-                col_groups.append(cur)
-                cur = [x]
-        if cur:
-            col_groups.append(cur)
-        col_centers = [np.mean(g) for g in col_groups]
-
-        # ====== Funkcja do znalezienia najbliższej kolumny ======
-        def nearest_col(x):
-            return np.argmin([abs(x - c) for c in col_centers])
-
-        # ====== Grupowanie i scalanie tekstów ======
-        final_rows = []
-        for row in rows:
-            cols = {i: [] for i in range(len(col_centers))}
-            for el in sorted(row, key=lambda e: e['x']):
-                col = nearest_col(el['x'])
-                cols[col].append(el)
-            # scalanie tekstów pionowo w obrębie komórki
-            merged_row = []
-            for i in range(len(col_centers)):
-                cell_texts = cols[i]
-                if not cell_texts:
-                    merged_row.append("")
-                else:
-                    # sortuj pionowo w komórce
-                    cell_texts = sorted(cell_texts, key=lambda e: e['y'])
-                    merged_lines = []
-                    current_block = [cell_texts[0]['text']]
-                    last_y = cell_texts[0]['y']
-                    for t in cell_texts[1:]:
-                        if abs(t['y'] - last_y) < self.CELL_VERTICAL_MERGE:
-                            # ta sama linia (scalamy w poziomie)
-                            current_block[-1] += " " + t['text']
-                        else:
-                            # nowa linia w tej samej komórce
-                            merged_lines.append(" ".join(current_block))
-                            current_block = [t['text']]
-                        last_y = t['y']
-                    merged_lines.append(" ".join(current_block))
-                    merged_row.append(" ".join(merged_lines))  # <-- łączenie w pionie
-            final_rows.append(merged_row)
-
-        # ====== Tworzenie DataFrame ======
-        max_cols = max(len(r) for r in final_rows)
-        for r in final_rows:
-            while len(r) < max_cols:
-                r.append("")
-        df = pd.DataFrame(final_rows)
-
-        logger.debug("\n📊 Odczytana tabela z wieloliniowymi komórkami:\n")
-        print(df)
+        logger.info(f"Czasy OCR: nagłówek {self.timings['header']:.2f}s, dane {self.timings['body']:.2f}s")
+        return self.dir/ self.HEADER_OUTPUT, self.dir / self.DATA_OUTPUT
 
-        self.file_service.save_df_to_csv(self.dir / output_file_path, df)
-        logger.debug(f"\n✅ Zapisano do pliku: {output_file_path}")
+    def _load_image(self, image):
+        if isinstance(image, np.ndarray):
+            # obrazy z ImageProcessingService są w skali szarości
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image
+        return cv2.imread(image)
 
-    def _fix_ocr_text(self, t: str) -> str:
-        """
-        Naprawia typowe błędy OCR w tabeli:
-          - ' j ' -> ' i '
-          - '9 1 23' -> '9 i 23'
-          - '141 28' -> '14 i 28'
-          - '111 25' -> '11 i 25'
-        Zasada: tylko rozdzielamy ostatnią cyfrę '1' z lewego tokena jeśli
-        po rozdziale zakładamy sensowne dni (1-31) i po prawej też jest liczba 1-31.
-        """
-        if not t:
-            return t
-
-        # normalizacja
-        s = t.strip()
-        s = s.replace(' j ', ' i ')
-        s = re.sub(r'\s+', ' ', s)
-
-        tokens = s.split(' ')
-        out = []
-        i = 0
-        while i < len(tokens):
-            tok = tokens[i]
-
-            # jeżeli token to dokładnie 'i' -> zostaw
-            if tok == 'i':
-                # unikamy powtórzeń 'i i'
-                if not (out and out[-1] == 'i'):
-                    out.append('i')
-                i += 1
-                continue
+    def ocr(self, image, output_file_path):
+        # ====== Wczytanie i OCR ======
+        img = self._load_image(image)
+        results = self._readtext(img)
 
-            # jeśli mamy pojedyncze '1' pomiędzy liczbami -> separator 'i'
-            if tok == '1' and i - 1 >= 0 and i + 1 < len(tokens):
-                if tokens[i - 1].isdigit() and tokens[i + 1].isdigit():
-                    # zamień '1' będące separatorem na 'i'
-                    if not (out and out[-1] == 'i'):
-                        out.append('i')
-                    i += 1
-                    continue
+        texts, boxes = self._text_elements(results)
+        xs, ys = TableLayout.anchor_points(boxes, anchor="center")
+        rows = TableLayout(self.TOLERANCE_Y, self.TOLERANCE_X_GROUP).build(texts, xs, ys)
+
+        self._save_rows(rows, output_file_path)
 
-            # jeśli token jest cyfrowy i kończy się na '1' oraz istnieje nast. token cyfrowy,
-            # spróbuj rozdzielić ostatnią '1' jako 'i' -> left + 'i' + next
-            if tok.isdigit() and tok.endswith('1') and len(tok) >= 2 and (i + 1) < len(tokens) and tokens[
-                i + 1].isdigit():
-                left = tok[:-1]
-                # walidacja: left i next muszą być plausybilne dni 1-31
-                try:
-                    if 1 <= int(left) <= 31 and 1 <= int(tokens[i + 1]) <= 31:
-                        # dodaj left i separator 'i' (unikaj powtórzeń)
-                        if not (out and out[-1] == left):
-                            out.append(left)
-                        if not (out and out[-1] == 'i'):
-                            out.append('i')
-                        # nie konsumujemy next tutaj — zostanie dodany w kolejnym kroku
-                        i += 1
-                        continue
-                except ValueError:
-                    pass  # jeśli nie da się zamienić, traktujemy normalnie
-
-            # default: dodaj token (ale unikaj duplikatów spacji / i i)
-            out.append(tok)
-            i += 1
-
-        # finalna normalizacja: usuń powtórne 'i' lub spacje
-        res = ' '.join(out)
-        res = re.sub(r'\s+', ' ', res).strip()
-        # czasami powstały "i i" — zamień wielokrotne na jedno
-        res = re.sub(r'(?:\bi\b[\s]*){2,}', 'i ', res).strip()
-        return res
-
-    def process_table_image(self, file_path, output_file_path, TOL_Y, TOL_X_GROUP, CELL_MERGE):
-        img = cv2.imread(file_path)
-        results = self.reader.readtext(img, contrast_ths=0.10, adjust_contrast=1.3)
-
-        # --- Tworzenie elementów ---
-        elements = []
+    def _text_elements(self, results, fix_text=False):
+        texts, boxes = [], []
         for bbox, text, conf in results:
             if not text:
                 continue
+            text = text.strip()
+            texts.append(self._fix_ocr_text(text) if fix_text else text)
+            boxes.append(bbox)
+        return texts, boxes
 
-            x_coords = [p[0] for p in bbox]
-            y_coords = [p[1] for p in bbox]
-
-            center_x = np.mean(x_coords)
-            baseline_y = max(y_coords)  # kluczowe!
-
-            elements.append({
-                'text': self._fix_ocr_text(text.strip()),
-                'x': center_x,
-                'y': baseline_y,
-                'bbox': bbox
-            })
-
-        # --- Sortowanie po Y (wiersze) ---
-        elements.sort(key=lambda e: (round(e['y'] / 5), e['x']))
-
-        rows, current_row, last_y = [], [], None
-        for el in elements:
-            if last_y is None or abs(el['y'] - last_y) < TOL_Y:
-                current_row.append(el)
-            else:
-                rows.append(current_row)
-                current_row = [el]
-            last_y = el['y']
-        if current_row:
-            rows.append(current_row)
-
-        # --- Wykrywanie kolumn ---
-        all_x = sorted([e['x'] for e in elements])
-        col_groups = []
-        cur = [all_x[0]]
-        for x in all_x[1:]:
-            if abs(x - cur[-1]) < TOL_X_GROUP:
-                cur.append(x)
-            else:
-                col_groups.append(cur)
-                cur = [x]
-        if cur:
-            col_groups.append(cur)
-
-        col_centers = [np.mean(g) for g in col_groups]
-
-        def nearest_col(x):
-            return np.argmin([abs(x - c) for c in col_centers])
-
-        # --- Grupowanie i scalanie tekstów ---
-        final_rows = []
-        for row in rows:
-            cols = {i: [] for i in range(len(col_centers))}
-            for el in row:
-                col = nearest_col(el['x'])
-                cols[col].append(el)
-
-            merged_row = []
-            for i in range(len(col_centers)):
-                items = cols[i]
-                if not items:
-                    merged_row.append("")
-                    continue
-
-                # lepsze sortowanie: najpierw Y, potem X
-                items = sorted(items, key=lambda e: (e['y'], e['x']))
-
-                merged = []
-                line = [items[0]['text']]
-                last_y = items[0]['y']
+    def _save_rows(self, rows, output_file_path):
+        df = pd.DataFrame(rows)
 
-                for t in items[1:]:
-                    if abs(t['y'] - last_y) < CELL_MERGE:
-                        line.append(t['text'])
-                    else:
-                        merged.append(" ".join(line))
-                        line = [t['text']]
-                    last_y = t['y']
+        logger.debug(f"\n📊 Odczytana tabela z wieloliniowymi komórkami:\n{df}")
 
-                merged.append(" ".join(line))
+        self.file_service.save_df_to_csv(self.dir / output_file_path, df)
+        logger.debug(f"\n✅ Zapisano do pliku: {output_file_path}")
 
-                # finalny tekst komórki
-                merged_row.append(" ".join(merged))
+    def _fix_ocr_text(self, t: str) -> str:
+        return fix_ocr_text(t)
 
-            final_rows.append(merged_row)
+    def process_table_image(self, image, output_file_path, tolerance_y, tolerance_x):
+        img = self._load_image(image)
+        results = self._readtext(img, contrast_ths=0.10, adjust_contrast=1.3)
 
-        # ujednolicenie długości wierszy
-        width = max(len(r) for r in final_rows)
-        for r in final_rows:
-            while len(r) < width:
-                r.append("")
+        # w danych liczy się dolna krawędź tekstu (baseline), nie środek ramki
+        texts, boxes = self._text_elements(results, fix_text=True)
+        xs, ys = TableLayout.anchor_points(boxes, anchor="baseline")
+        rows = TableLayout(tolerance_y, tolerance_x).build(texts, xs, ys)
 
-        df = pd.DataFrame(final_rows)
+        self._save_rows(rows, output_file_path)
 
-        logger.debug("\n📊 Odczytana tabela z wieloliniowymi komórkami:\n")
-        print(df)
+    def process_table_cells(self, image, output_file_path):
+        """
+        Odczyt tabeli na podstawie linii siatki: komórki wyznaczane są z linii tabeli,
+        a do rozpoznawania trafiają tylko wycinki pasów tekstu (jedno wywołanie recognize,
+        bez detektora CRAFT i bez grupowania wierszy/kolumn po tolerancjach).
+        """
+        img = self._load_image(image)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        ys, xs = ImageProcessingService.detect_grid_lines(gray)
+        if len(ys) < 2 or len(xs) < 2:
+            logger.warning("Nie wykryto siatki tabeli, używam detekcji tekstu.")
+            self.process_table_image(image, output_file_path, self.BODY_TOLERANCE_Y, self.BODY_TOLERANCE_X_GROUP)
+            return
+
+        # --- Wyznaczenie komórek i pasów tekstu w komórkach ---
+        boxes, owners = [], []
+        pad = self.CELL_PADDING
+        for row, (top, bottom) in enumerate(zip(ys, ys[1:])):
+            for col, (left, right) in enumerate(zip(xs, xs[1:])):
+                if bottom - top <= 2 * pad or right - left <= 2 * pad:
+                    continue
+                for line_top, line_bottom in self._text_lines(gray[top + pad:bottom - pad, left + pad:right - pad]):
+                    boxes.append([left + pad, right - pad, top + pad + line_top, top + pad + line_bottom])
+                    owners.append((row, col))
+
+        # --- Rozpoznanie wszystkich wycinków naraz ---
+        texts = {}
+        if boxes:
+            with self._inference_lock:
+                results = self.reader.recognize(gray, horizontal_list=boxes, free_list=[], batch_size=len(boxes),
+                                                contrast_ths=0.10, adjust_contrast=1.3)
+            for bbox, text, conf in results:
+                texts[(int(bbox[0][0]), int(bbox[0][1]))] = text
+
+        # --- Składanie tabeli ---
+        final_rows = [["" for _ in range(len(xs) - 1)] for _ in range(len(ys) - 1)]
+        for (x_min, x_max, y_min, y_max), (row, col) in zip(boxes, owners):
+            text = self._fix_ocr_text(texts.get((x_min, y_min), "").strip())
+            if text:
+                final_rows[row][col] = f"{final_rows[row][col]} {text}".strip()
+
+        # pomijamy pasy bez żadnego tekstu (np. podwójne linie)
+        final_rows = [r for r in final_rows if any(r)]
+        self._save_rows(final_rows, output_file_path)
+
+    def _text_lines(self, cell):
+        """
+        Zwraca pasy (góra, dół) wierszy tekstu w komórce na podstawie profilu poziomego.
+        """
+        ink_rows = np.flatnonzero((cell < 128).any(axis=1))
+        if ink_rows.size == 0:
+            return []
+        splits = np.flatnonzero(np.diff(ink_rows) > self.LINE_GAP) + 1
+
+        lines, pending_top = [], None
+        for run in np.split(ink_rows, splits):
+            top, bottom = int(run[0]), int(run[-1]) + 1
+            if pending_top is not None:
+                top, pending_top = pending_top, None
+            if bottom - top < self.MIN_LINE_HEIGHT:
+                # drobny fragment (np. kreska nad literą) doklejamy do sąsiedniego pasa
+                if lines:
+                    lines[-1] = (lines[-1][0], bottom)
+                else:
+                    pending_top = top
+                continue
+            lines.append((top, bottom))
+        if pending_top is not None:
+            lines.append((pending_top, int(ink_rows[-1]) + 1))
 
-        self.file_service.save_df_to_csv(self.dir / output_file_path, df)
-        logger.debug(f"\n✅ Zapisano do pliku: {output_file_path}")
+        # margines wokół tekstu pomaga rozpoznawaniu
+        return [(max(top - 2, 0), min(bottom + 2, cell.shape[0])) for top, bottom in lines]
@@ -25,11 +25,11 @@ class PdfService:
         doc.close()
         return num_pages > 1, num_pages
 
-    def detect_year(self):
+    def detect_year(self, page_number=0):
         pattern = r'KALENDARZ ODBIORU ODPADÓW\s+(\d{4})'
 
         doc = fitz.open(self.file)
-        page = doc.load_page(0)
+        page = doc.load_page(page_number)
         text = page.get_text()
         match = re.search(pattern, text, re.IGNORECASE)
         doc.close()
@@ -37,7 +37,7 @@ class PdfService:
             return match.group(1)
         else:
             logger.warning("Cannot recognized YEAR from PDF file, try to resolve YEAR by current date.")
-            return self._define_date_if_not_reckognised
+            return self._define_date_if_not_reckognised()
 
     def _define_date_if_not_reckognised(self):
         now = date.today()
@@ -0,0 +1,142 @@
+import datetime
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from garbage.model.Garbage import Garbage
+from garbage.model.GarbageCollect import GarbageCollect
+
+logger = logging.getLogger(__name__)
+
+# kandydackie odstępy w dniach: co tydzień, co 2, 3 i 4 tygodnie
+INTERVALS = (7, 14, 21, 28)
+# przybliżony rozmiar w bajtach: osobne wydarzenie, dodatkowe linie RRULE/EXDATE/RDATE, jedna data wyjątku
+EVENT_BYTES = 330
+RULE_BYTES = 90
+DATE_BYTES = 9
+
+
+@dataclass
+class Series:
+    """
+    Cykliczny odbiór: co interval_days od start do until, bez exdates, z dodatkowymi rdates.
+    """
+    garbage_type: Garbage
+    start: datetime.date
+    interval_days: int
+    until: datetime.date
+    exdates: list[datetime.date] = field(default_factory=list)
+    rdates: list[datetime.date] = field(default_factory=list)
+
+    def rule(self) -> dict:
+        return {"FREQ": "WEEKLY", "UNTIL": self.until, "INTERVAL": self.interval_days // 7}
+
+    def dates(self) -> list[datetime.date]:
+        """
+        Rozwinięcie serii do listy dat (sprawdzenie, że kompresja niczego nie gubi).
+        """
+        count = (self.until - self.start).days // self.interval_days + 1
+        expected = {self.start + timedelta(days=n * self.interval_days) for n in range(count)}
+        return sorted((expected - set(self.exdates)) | set(self.rdates))
+
+
+def compress(schedule) -> list[GarbageCollect | Series]:
+    """
+    Zastępuje regularne odbiory danego typu seriami (RRULE + EXDATE + RDATE), jeśli to zmniejsza plik.
+    Wpisy z adnotacją zostają osobnymi wydarzeniami, bo niosą własny komentarz.
+    """
+    result = []
+    dates_by_type = {}
+    for entry in schedule:
+        if entry.additional_info:
+            result.append(entry)
+        else:
+            dates_by_type.setdefault(entry.garbage_type, set()).add(entry.date.date())
+
+    for garbage_type, dates in dates_by_type.items():
+        result.extend(_compress_dates(garbage_type, sorted(dates)))
+
+    result.sort(key=lambda item: (_first_date(item), item.garbage_type.name))
+    return result
+
+
+def expand(items) -> list[tuple[Garbage, datetime.date]]:
+    """
+    Odwrotność compress: (typ, data) dla każdego odbioru, posortowane.
+    """
+    dates = []
+    for item in items:
+        if isinstance(item, Series):
+            dates += [(item.garbage_type, d) for d in item.dates()]
+        else:
+            dates.append((item.garbage_type, item.date.date()))
+    return sorted(dates, key=lambda pair: (pair[1], pair[0].name))
+
+
+def _compress_dates(garbage_type, dates: list[datetime.date]) -> list[GarbageCollect | Series]:
+    """
+    Programowanie dynamiczne po kolejnych datach: każdy odcinek to albo pojedyncze wydarzenie,
+    albo seria z najtańszym odstępem kończąca się terminem zgodnym z rytmem;
+    wybieramy podział o najmniejszym szacowanym rozmiarze.
+    """
+    n = len(dates)
+    best = [0] + [float("inf")] * n
+    choice = [None] * (n + 1)
+
+    for j in range(n):
+        if best[j] + EVENT_BYTES < best[j + 1]:
+            best[j + 1] = best[j] + EVENT_BYTES
+            choice[j + 1] = (j, None)
+
+        for interval in INTERVALS:
+            matched, off_pattern, last_on = 1, 0, 0
+            for i in range(j + 1, n):
+                offset = (dates[i] - dates[j]).days
+                if offset % interval != 0:
+                    off_pattern += 1
+                    continue
+                matched += 1
+                last_on = offset
+                missing = last_on // interval + 1 - matched
+                # RDATE tylko dla przesuniętych terminów (każdy zastępuje brakujący),
+                # inaczej seria połykałaby fragmenty o innym rytmie (np. letni odbiór co tydzień)
+                if off_pattern > missing:
+                    continue
+                cost = best[j] + EVENT_BYTES + RULE_BYTES + DATE_BYTES * (missing + off_pattern)
+                if cost < best[i + 1]:
+                    best[i + 1] = cost
+                    choice[i + 1] = (j, interval)
+
+    items = []
+    i = n
+    while i > 0:
+        j, interval = choice[i]
+        items.append(_build_item(garbage_type, dates[j:i], interval))
+        i = j
+    items.reverse()
+    logger.debug(f"{garbage_type.name}: {n} odbiorów -> {len(items)} wydarzeń")
+    return items
+
+
+def _build_item(garbage_type, dates, interval):
+    start = dates[0]
+    if interval is None:
+        return GarbageCollect(garbage_type, datetime.datetime.combine(start, datetime.time()), None)
+
+    on_pattern = [d for d in dates if (d - start).days % interval == 0]
+    until = on_pattern[-1]
+    count = (until - start).days // interval + 1
+    expected = [start + timedelta(days=n * interval) for n in range(count)]
+    present = set(on_pattern)
+    return Series(
+        garbage_type=garbage_type,
+        start=start,
+        interval_days=interval,
+        until=until,
+        exdates=[d for d in expected if d not in present],
+        rdates=[d for d in dates if (d - start).days % interval != 0],
+    )
+
+
+def _first_date(item) -> datetime.date:
+    return item.start if isinstance(item, Series) else item.date.date()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from garbage.services.FileService import FileService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    path: Path
+    year: str | None
+    files: dict[str, str] = field(default_factory=dict)
+
+    def file(self, role) -> Path | None:
+        name = self.files.get(role)
+        if name and (self.path / name).exists():
+            return self.path / name
+        return None
+
+
+class ResultCache:
+    """
+    Trwały cache wyników przetwarzania PDF (CSV po OCR, plik ICS, podgląd tabeli).
+    Klucz to SHA-256 zawartości PDF + numer strony + tryb OCR + wersja potoku.
+    Rozmiar ograniczony, najdawniej używane wpisy są usuwane (LRU po czasie dostępu).
+    """
+
+    # zmień, gdy zmienia się sposób przetwarzania obrazu/OCR – stare wpisy przestaną pasować
+    # 2: CSV z warstwy tekstowej PDF (TextLayerService) zamiast OCR, gdy tabela jest kompletna
+    PIPELINE_VERSION = "2"
+    CACHE_SUBFOLDER = Path("cache")
+    META_FILE = "meta.json"
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    CSV = "csv"
+    ICS = "ics"
+    PREVIEW = "preview"
+
+    _lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    def __init__(self, file_service: FileService, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.file_service = file_service
+        self.max_bytes = max_bytes
+        self.dir = file_service.base_directory / file_service.resources_dir / self.CACHE_SUBFOLDER
+        self.file_service.create_folder(self.dir)
+
+    @classmethod
+    def key_for(cls, pdf_path, page_number: int = 0, cell_ocr: bool = False) -> str:
+        return cls.key_from_digest(cls.file_digest(pdf_path), page_number, cell_ocr)
+
+    @staticmethod
+    def file_digest(path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def key_from_digest(cls, pdf_sha256: str, page_number: int = 0, cell_ocr: bool = False) -> str:
+        # tryb OCR w kluczu – wynik OCR po komórkach nie może trafić do zapytania o zwykły OCR i odwrotnie
+        mode = "cell" if cell_ocr else "detect"
+        return hashlib.sha256(f"{pdf_sha256}:{page_number}:{mode}:{cls.PIPELINE_VERSION}".encode()).hexdigest()
+
+    @staticmethod
+    def schedule_id(pdf_sha256: str, page_number: int = 0) -> str:
+        """
+        Identyfikator harmonogramu w UID wydarzeń z treści PDF + strony – tylko gdy nie ma stałego źródła
+        (np. plik wgrany w aplikacji web); poprawiona wersja PDF dostaje nowe UID.
+        """
+        return f"{pdf_sha256[:32]}-{page_number}"
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        return {"hits": cls.hits, "misses": cls.misses}
+
+    def lookup(self, key, role=CSV) -> CacheEntry | None:
+        """
+        Zwraca wpis, jeśli istnieje i zawiera plik o podanej roli; liczy trafienia/chybienia.
+        """
+        entry = self._read_entry(key)
+        found = entry is not None and entry.file(role) is not None
+        with self._lock:
+            if found:
+                ResultCache.hits += 1
+            else:
+                ResultCache.misses += 1
+        if not found:
+            logger.debug(f"Cache miss ({role}): {key}")
+            return None
+
+        # odświeżenie czasu dostępu na potrzeby LRU
+        os.utime(entry.path / self.META_FILE)
+        logger.info(f"Cache hit ({role}): {key}")
+        return entry
+
+    def contains(self, key, role=CSV) -> bool:
+        """
+        Sprawdza obecność wpisu bez liczenia trafień i bez odświeżania LRU.
+        """
+        entry = self._read_entry(key)
+        return entry is not None and entry.file(role) is not None
+
+    def store(self, key, year=None, **files) -> CacheEntry:
+        """
+        Kopiuje pliki do wpisu, np. store(key, year, csv=path, ics=path).
+        """
+        entry_dir = self.dir / key
+        self.file_service.create_folder(entry_dir)
+        entry = self._read_entry(key) or CacheEntry(key=key, path=entry_dir, year=None)
+        if year is not None:
+            entry.year = str(year)
+
+        for role, source in files.items():
+            if source is None:
+                continue
+            source = Path(source)
+            self.file_service.copy_file(source, entry_dir / source.name)
+            entry.files[role] = source.name
+
+        meta = {"year": entry.year, "files": entry.files, "created": time.time()}
+        # meta.json na końcu i atomowo – lookup w innym procesie nie zobaczy wpisu bez kompletnych plików
+        with self.file_service.atomic_write(entry_dir / self.META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        self._evict(keep=key)
+        return entry
+
+    def _read_entry(self, key) -> CacheEntry | None:
+        meta_path = self.dir / key / self.META_FILE
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"Uszkodzony wpis cache: {key}")
+            return None
+        return CacheEntry(key=key, path=self.dir / key, year=meta.get("year"), files=meta.get("files", {}))
+
+    def _evict(self, keep=None):
+        entries = []
+        total = 0
+        for entry_dir in self.dir.iterdir():
+            if not entry_dir.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+            meta_path = entry_dir / self.META_FILE
+            last_used = meta_path.stat().st_mtime if meta_path.exists() else 0
+            entries.append((last_used, size, entry_dir))
+            total += size
+
+        for last_used, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry_dir.name == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            logger.info(f"Usunięto z cache: {entry_dir.name}")
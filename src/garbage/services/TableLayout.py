@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class TableLayout:
+    """
+    Składa tabelę z rozpoznanych fragmentów tekstu na podstawie ich współrzędnych:
+      - wiersze: przerwa w Y >= tolerance_y między kolejnymi (posortowanymi) elementami,
+      - kolumny: przerwa w X >= tolerance_x między kolejnymi środkami, element trafia
+        do najbliższego środka kolumny,
+      - komórka: teksty posortowane po (Y, X) i złączone spacją.
+    Wszystko liczone na tablicach NumPy, bez pętli po parach element-kolumna.
+    """
+
+    def __init__(self, tolerance_y, tolerance_x):
+        self.tolerance_y = tolerance_y
+        self.tolerance_x = tolerance_x
+
+    @staticmethod
+    def anchor_points(boxes, anchor="center"):
+        """
+        boxes – tablica (n, 4, 2) z narożnikami ramek (jak bbox z easyocr)
+        anchor – "center" (środek ramki) lub "baseline" (dolna krawędź ramki) dla osi Y
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4, 2)
+        xs = boxes[:, :, 0].mean(axis=1)
+        ys = boxes[:, :, 1].max(axis=1) if anchor == "baseline" else boxes[:, :, 1].mean(axis=1)
+        return xs, ys
+
+    def build(self, texts, xs, ys) -> list[list[str]]:
+        texts = np.asarray(texts, dtype=object)
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        count = len(texts)
+        if count == 0:
+            return []
+
+        row_ids = self._group_rows(ys)
+        col_centers = self._column_centers(xs)
+        col_ids = self._nearest_columns(xs, col_centers)
+
+        n_rows, n_cols = int(row_ids.max()) + 1, len(col_centers)
+        table = [["" for _ in range(n_cols)] for _ in range(n_rows)]
+
+        # kolejność: wiersz, kolumna, potem pozycja w komórce (Y, X)
+        order = np.lexsort((xs, ys, col_ids, row_ids))
+        cell_keys = row_ids[order] * n_cols + col_ids[order]
+        bounds = np.flatnonzero(np.diff(cell_keys)) + 1
+        for cell in np.split(order, bounds):
+            table[row_ids[cell[0]]][col_ids[cell[0]]] = " ".join(texts[cell])
+        return table
+
+    def _group_rows(self, ys):
+        order = np.argsort(ys, kind="stable")
+        breaks = np.diff(ys[order]) >= self.tolerance_y
+        row_ids = np.empty(len(ys), dtype=np.int64)
+        row_ids[order] = np.concatenate(([0], np.cumsum(breaks)))
+        return row_ids
+
+    def _column_centers(self, xs):
+        sorted_x = np.sort(xs)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_x) >= self.tolerance_x) + 1))
+        sizes = np.diff(np.append(starts, len(sorted_x)))
+        return np.add.reduceat(sorted_x, starts) / sizes
+
+    @staticmethod
+    def _nearest_columns(xs, centers):
+        if len(centers) == 1:
+            return np.zeros(len(xs), dtype=np.int64)
+        right = np.clip(np.searchsorted(centers, xs), 1, len(centers) - 1)
+        left = right - 1
+        # przy remisie wygrywa kolumna po lewej (jak np.argmin)
+        return np.where(xs - centers[left] <= centers[right] - xs, left, right)
@@ -0,0 +1,130 @@
+import csv
+import logging
+import re
+from pathlib import Path
+
+import fitz
+
+from garbage.model.Garbage import GarbageRegistry
+from garbage.services.CsvProcessing import CsvProcessing
+from garbage.services.DataProcessor import MONTH_BY_NAME
+from garbage.services.FileService import FileService
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w ]+", flags=re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+_DIGIT = re.compile(r"\d")
+
+
+class TextLayerService:
+    """
+    Szybka ścieżka dla PDF z warstwą tekstową (generowanych cyfrowo): tabela harmonogramu
+    odczytywana wprost z PDF (find_tables) i zapisywana jako ten sam CSV, który daje OCR.
+    Gdy warstwy tekstowej brak albo tabela jest niekompletna, process zwraca None
+    i harmonogram idzie przez rasteryzację i OCR.
+    """
+
+    # nagłówek pierwszej kolumny, którego oczekuje DataProcessor
+    MONTH_COLUMN = "Miesiąc"
+    PREVIEW_DPI = 150
+    PREVIEW_MARGIN = 5
+
+    def __init__(self, file_service: FileService, pdf_path, page_number=0, save_preview=False):
+        self.file_service = file_service
+        self.pdf_path = pdf_path
+        self.page_number = page_number
+        self.save_preview = save_preview
+        self.dir = self.file_service.temporary_directory / CsvProcessing.TMP_SUBFOLDER
+
+    def process(self) -> Path | None:
+        """
+        Zwraca ścieżkę CSV albo None, jeśli harmonogram wymaga OCR.
+        """
+        doc = self.file_service.open_pdf(self.pdf_path)
+        try:
+            page = doc.load_page(self.page_number)
+            if not page.get_text("words"):
+                logger.info("PDF bez warstwy tekstowej, używam OCR.")
+                return None
+
+            table = self._find_schedule_table(page)
+            if table is None:
+                logger.info("Nie znaleziono kompletnej tabeli w warstwie tekstowej PDF, używam OCR.")
+                return None
+            header, rows, bbox = table
+
+            self.file_service.create_folder(self.dir)
+            output = self.dir / CsvProcessing.OUTPUT_FILE_NAME
+            # ten sam format co CsvProcessing (pandas): ';', cudzysłowy tylko w razie potrzeby, '\n'
+            with self.file_service.atomic_write(output, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f, delimiter=";", lineterminator="\n")
+                writer.writerow(header)
+                writer.writerows(rows)
+
+            if self.save_preview:
+                self._save_preview(page, bbox)
+            logger.info(f"Tabela odczytana z warstwy tekstowej PDF: {len(rows)} wierszy, {len(header)} kolumn")
+            return output
+        finally:
+            doc.close()
+
+    def _find_schedule_table(self, page) -> tuple[list[str], list[list[str]], fitz.Rect] | None:
+        """
+        (nagłówek, wiersze, obszar) największej tabeli na stronie, która przechodzi walidację kompletności.
+        """
+        tables = sorted(page.find_tables().tables, key=lambda t: self._area(t.bbox), reverse=True)
+        for table in tables:
+            cells = [[self._normalize_cell(cell) for cell in row] for row in table.extract()]
+            # wiersze z samymi pustymi komórkami (np. podwójne linie siatki)
+            cells = [row for row in cells if any(row)]
+            if len(cells) < 2:
+                continue
+            header = [self._normalize_header(name) for name in cells[0]]
+            rows = cells[1:]
+            if self._is_complete(header, rows):
+                header[0] = self.MONTH_COLUMN
+                return header, rows, fitz.Rect(table.bbox)
+        return None
+
+    def _is_complete(self, header: list[str], rows: list[list[str]]) -> bool:
+        """
+        Tabela nadaje się do pominięcia OCR, gdy: pierwsza kolumna to nazwy miesięcy (bez powtórzeń),
+        każda pozostała kolumna to znany rodzaj odpadów, a każdy miesiąc ma przynajmniej jeden termin.
+        Brak któregoś z tych warunków oznacza niepełną warstwę tekstową (np. dni jako krzywe).
+        """
+        if len(header) < 2 or any(GarbageRegistry.resolve(name) is None for name in header[1:]):
+            return False
+        months = [MONTH_BY_NAME.get(row[0].lower()) for row in rows]
+        if None in months or len(set(months)) != len(months):
+            return False
+        return all(any(_DIGIT.search(cell) for cell in row[1:]) for row in rows)
+
+    def _save_preview(self, page, table_bbox: fitz.Rect):
+        """
+        Podgląd tabeli dla aplikacji web – renderowany tylko obszar tabeli, nie cała strona w 300 DPI.
+        """
+        # tylko stałe ścieżek podglądu – cv2 ładowany wyłącznie, gdy podgląd jest potrzebny
+        from garbage.services.ImageProcessingService import ImageProcessingService
+
+        preview_dir = self.file_service.temporary_directory / ImageProcessingService.TMP_SUBFOLDER
+        self.file_service.create_folder(preview_dir)
+        clip = table_bbox + (-self.PREVIEW_MARGIN, -self.PREVIEW_MARGIN, self.PREVIEW_MARGIN, self.PREVIEW_MARGIN)
+        pix = page.get_pixmap(dpi=self.PREVIEW_DPI, clip=clip & page.rect)
+        with self.file_service.atomic_path(preview_dir / ImageProcessingService.CROPPED_IMAGE_NAME) as temporary:
+            pix.save(temporary)
+
+    @staticmethod
+    def _normalize_cell(cell: str | None) -> str:
+        # komórki wieloliniowe i scalone (None) jak w OCR: jedna linia, pojedyncze spacje
+        return _WHITESPACE.sub(" ", cell or "").strip()
+
+    @staticmethod
+    def _normalize_header(name: str) -> str:
+        # jak CsvProcessing._process_headers: bez znaków innych niż litery, cyfry i spacje
+        return _WHITESPACE.sub(" ", _NON_WORD.sub("", name)).strip()
+
+    @staticmethod
+    def _area(bbox) -> float:
+        x0, y0, x1, y1 = bbox
+        return (x1 - x0) * (y1 - y0)
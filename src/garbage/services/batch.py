@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+from garbage.services.FileService import FileService
+
+logger = logging.getLogger(__name__)
+
+REPORT_FILE_NAME = "batch_report.json"
+# przy limicie pamięci proces roboczy jest zastępowany nowym co tyle plików – pamięć po dużych stronach
+# (fragmentacja sterty) wraca do systemu, a ponowne załadowanie Readera to ułamek czasu OCR tylu plików
+WORKER_MAX_TASKS = 20
+
+# limit pamięci procesu roboczego (MB), ustawiany w _init_worker
+_memory_limit_mb = None
+
+
+@dataclass
+class BatchResult:
+    source: str
+    status: str
+    output: str | None = None
+    seconds: float = 0.0
+    error: str | None = None
+    page: int | None = None
+    # szczytowa pamięć rezydentna procesu roboczego po tym pliku
+    peak_rss_mb: int | None = None
+
+
+def collect_inputs(source) -> list[Path]:
+    """
+    source – katalog z plikami PDF lub manifest (plik tekstowy, jedna ścieżka w linii,
+    ścieżki względne liczone od katalogu manifestu, linie z # pomijane)
+    """
+    source = Path(source)
+    if source.is_dir():
+        return sorted(p for p in source.iterdir() if p.suffix.lower() == ".pdf")
+
+    inputs = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = Path(line)
+            inputs.append(path if path.is_absolute() else source.parent / path)
+    return inputs
+
+
+def process_batch(base_dir, source, output_dir, workers=None, memory_limit_mb=None, cell_ocr=False):
+    """
+    Przetwarza wiele harmonogramów w puli procesów. Każdy proces ładuje Reader EasyOCR raz
+    i używa go do kolejnych plików. Wynik: jeden ICS na plik wejściowy + raport JSON.
+    memory_limit_mb – pamięć na proces: procesów nie więcej, niż mieści pamięć maszyny/kontenera
+    (zob. create_worker_pool)
+    """
+    inputs = collect_inputs(source)
+    output_dir = Path(output_dir)
+    FileService(base_dir).create_folder(output_dir)
+    workers = workers or os.cpu_count() or 1
+    if memory_limit_mb:
+        workers = min(workers, _workers_for_memory(memory_limit_mb))
+    workers = max(1, min(workers, len(inputs) or 1))
+
+    logger.info(f"Przetwarzanie wsadowe: {len(inputs)} plików, {workers} procesów")
+    start = time.perf_counter()
+
+    with create_worker_pool(base_dir, workers, memory_limit_mb) as pool:
+        results = process_documents(base_dir, [(pdf_path, None, None) for pdf_path in inputs], output_dir, pool,
+                                    cell_ocr=cell_ocr)
+
+    total_seconds = time.perf_counter() - start
+    _save_report(output_dir / REPORT_FILE_NAME, results, total_seconds, workers)
+    return results
+
+
+def process_pages(base_dir, pdf_path, output_dir, workers=None, cell_ocr=False, calendar_id=None):
+    """
+    Przetwarza równolegle wszystkie strony wielostronicowego PDF – rasteryzacja i OCR każdej strony
+    w osobnym procesie. Wynik: jeden ICS na stronę + raport JSON, wyniki posortowane po numerze strony.
+    calendar_id – identyfikator harmonogramu w UID (do niego dopisywany jest numer strony),
+                  domyślnie ścieżka pliku ICS strony
+    """
+    from garbage.services.CalendarService import CalendarService
+    from garbage.services.PdfService import PdfService
+
+    pdf_path = Path(pdf_path)
+    output_dir = Path(output_dir)
+    FileService(base_dir).create_folder(output_dir)
+    _, num_of_pages = PdfService(pdf_path).detect_multipage()
+    workers = max(1, min(workers or os.cpu_count() or 1, num_of_pages))
+
+    start = time.perf_counter()
+    jobs = [(pdf_path, page, CalendarService.calendar_id_for(calendar_id, page) if calendar_id else None)
+            for page in range(num_of_pages)]
+    with create_worker_pool(base_dir, workers) as pool:
+        results = sorted(process_documents(base_dir, jobs, output_dir, pool, cell_ocr=cell_ocr),
+                         key=lambda r: r.page)
+
+    total_seconds = time.perf_counter() - start
+    logger.info(f"Przetworzono {num_of_pages} stron w {total_seconds:.1f}s")
+    _save_report(output_dir / REPORT_FILE_NAME, results, total_seconds, workers)
+    return results
+
+
+def process_documents(base_dir, jobs, output_dir, pool, cell_ocr=False) -> list[BatchResult]:
+    """
+    jobs – lista (ścieżka PDF, numer strony albo None dla pierwszej strony, identyfikator kalendarza w UID
+           albo None dla ścieżki pliku ICS)
+    """
+    futures = {
+        pool.submit(_process_one, base_dir, str(pdf_path), str(output_dir), cell_ocr, page, calendar_id):
+            (pdf_path, page)
+        for pdf_path, page, calendar_id in jobs
+    }
+    return _collect(futures)
+
+
+def create_worker_pool(base_dir, workers, memory_limit_mb=None) -> ProcessPoolExecutor:
+    """
+    memory_limit_mb – limit pamięci rezydentnej (RSS) procesu: procesy są co WORKER_MAX_TASKS plików
+                      zastępowane nowymi, a szczytowe RSS każdego pliku trafia do raportu
+                      (RLIMIT_AS nie nadaje się – torch i OpenMP rezerwują dużo więcej przestrzeni
+                      adresowej, niż faktycznie używają)
+    """
+    # spawn – czysty proces bez odziedziczonego stanu torcha
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                               initargs=(base_dir, memory_limit_mb, workers),
+                               max_tasks_per_child=WORKER_MAX_TASKS if memory_limit_mb else None)
+
+
+def _collect(futures) -> list[BatchResult]:
+    results = []
+    for future in as_completed(futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            # np. proces zabity przez OOM killer
+            source, page = futures[future]
+            result = BatchResult(source=str(source), status="error", error=repr(e), page=page)
+        logger.info(f"[{result.status}] {result.source} ({result.seconds:.2f}s)")
+        results.append(result)
+    return results
+
+
+def _init_worker(base_dir, memory_limit_mb, workers):
+    global _memory_limit_mb
+    _memory_limit_mb = memory_limit_mb
+
+    # bez tego każdy proces użyłby wszystkich rdzeni i procesy konkurowałyby o CPU
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+
+    from garbage.services.process import preload_ocr
+    preload_ocr(base_dir)
+
+
+def _process_one(base_dir, pdf_path, output_dir, cell_ocr, page_number=None, calendar_id=None) -> BatchResult:
+    from garbage.services.process import process_schedule
+
+    pdf_path = Path(pdf_path)
+    start = time.perf_counter()
+    # osobny katalog plików pośrednich, by procesy nie nadpisywały sobie CSV; usuwany po zadaniu
+    job_files = FileService.for_job(base_dir)
+    try:
+        calendar_path = Path(output_dir) / f"{output_name(pdf_path, page_number)}.ics"
+        calendar_file = process_schedule(base_dir, pdf_path, cell_ocr=cell_ocr,
+                                         temporary_directory=job_files.temporary_directory,
+                                         calendar_path=calendar_path, page_number=page_number or 0, streaming=True,
+                                         calendar_id=calendar_id)
+        result = BatchResult(source=str(pdf_path), status="ok", output=str(calendar_file),
+                             seconds=time.perf_counter() - start, page=page_number)
+    except Exception as e:
+        logger.exception(f"Błąd przetwarzania {pdf_path}")
+        result = BatchResult(source=str(pdf_path), status="error", error=repr(e),
+                             seconds=time.perf_counter() - start, page=page_number)
+    finally:
+        job_files.remove_temporary_directory()
+
+    result.peak_rss_mb = _peak_rss_mb()
+    if _memory_limit_mb and result.peak_rss_mb > _memory_limit_mb:
+        logger.warning(f"{pdf_path}: proces roboczy użył {result.peak_rss_mb} MB (limit {_memory_limit_mb} MB)")
+    return result
+
+
+def output_name(pdf_path, page_number=None) -> str:
+    """
+    Nazwa pliku ICS dla PDF (i strony): nazwa pliku + skrót katalogu, by pliki o tej samej nazwie
+    z różnych katalogów manifestu nie nadpisywały sobie kalendarzy.
+    """
+    pdf_path = Path(pdf_path)
+    directory = hashlib.sha1(str(pdf_path.resolve().parent).encode()).hexdigest()[:8]
+    name = f"{pdf_path.stem}-{directory}"
+    return name if page_number is None else f"{name}-{page_number + 1}"
+
+
+def _peak_rss_mb() -> int:
+    import resource
+
+    # ru_maxrss w KB (Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def _workers_for_memory(memory_limit_mb) -> int:
+    # import na żądanie – JobManager sam importuje ten moduł
+    from garbage.services.JobManager import available_memory_mb
+
+    memory_mb = available_memory_mb()
+    return max(1, memory_mb // memory_limit_mb) if memory_mb else os.cpu_count() or 1
+
+
+def _save_report(report_path, results, total_seconds, workers):
+    report = {
+        "total_seconds": round(total_seconds, 3),
+        "workers": workers,
+        "ok": sum(1 for r in results if r.status == "ok"),
+        "failed": sum(1 for r in results if r.status != "ok"),
+        "files": [asdict(r) for r in sorted(results, key=lambda r: r.source)],
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"Raport zapisany do {report_path} ({report['ok']} ok, {report['failed']} błędów, "
+                f"{total_seconds:.1f}s)")
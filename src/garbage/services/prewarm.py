@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from garbage.services.ApiProcessor import ApiProcessor
+from garbage.services.ApiService import ApiError
+from garbage.services.CalendarService import CalendarService
+from garbage.services.Crawler import Crawler
+from garbage.services.FileService import FileService
+from garbage.services.ResultCache import ResultCache
+from garbage.services.batch import create_worker_pool, process_documents
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "prewarm_manifest.json"
+REPORT_FILE = "prewarm_report.json"
+# adres -> link do PDF, z niego korzysta serwer subskrypcji kalendarzy (FeedServer)
+INDEX_FILE = "address_index.json"
+PREWARM_TMP_SUBFOLDER = Path("prewarm")
+
+
+def prewarm_schedules(base_dir, workers=None, download_workers=Crawler.DEFAULT_WORKERS, delay=Crawler.DEFAULT_DELAY):
+    """
+    Odświeża cache wyników dla wszystkich harmonogramów opublikowanych na eko-region.pl:
+    indeksuje adresy, pobiera tylko nowe lub zmienione PDF (ETag/Last-Modified + SHA-256)
+    i przepuszcza je przez OCR, zanim poprosi o nie użytkownik aplikacji web.
+    """
+    start = time.perf_counter()
+    file_service = FileService(base_dir)
+    cache = ResultCache(file_service)
+    manifest_path = cache.dir / MANIFEST_FILE
+    manifest = _load_manifest(manifest_path)
+    download_dir = file_service.temporary_directory / PREWARM_TMP_SUBFOLDER
+    file_service.create_folder(download_dir)
+
+    api_processor = ApiProcessor(file_service)
+    crawler = Crawler(api_processor, max_workers=download_workers, delay=delay)
+    entries = crawler.crawl()
+    Crawler.save_index(entries, cache.dir / INDEX_FILE)
+    urls = sorted(Crawler.schedule_urls(entries))
+    crawl_seconds = time.perf_counter() - start
+
+    # --- pobieranie tylko nowych / zmienionych plików ---
+    download_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=download_workers) as pool:
+        downloads = list(pool.map(
+            lambda url: _download_if_changed(crawler, api_processor, file_service, url, manifest.get(url, {}),
+                                             download_dir),
+            urls,
+        ))
+    download_seconds = time.perf_counter() - download_start
+
+    status = {"unchanged": 0, "changed": 0, "new": 0, "failed": 0, "recached": 0}
+    jobs = []
+    for url, (state, pdf_path, entry) in zip(urls, downloads):
+        if state == "unchanged" and not _is_cached(cache, entry, pdf_path):
+            # plik bez zmian, ale wynik wypadł z cache (LRU)
+            state = "recached"
+        status[state] += 1
+        if entry:
+            manifest[url] = entry
+        if state in ("changed", "new", "recached"):
+            # UID z URL harmonogramu – nowa wersja PDF pod tym samym adresem zmienia tylko przesunięte odbiory
+            jobs += [(pdf_path, page, CalendarService.calendar_id_for(url, page)) for page in range(entry["pages"])]
+
+    # --- OCR zmienionych dokumentów (wyniki trafiają do ResultCache) ---
+    ocr_start = time.perf_counter()
+    results = []
+    if jobs:
+        with create_worker_pool(base_dir, min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+            results = process_documents(base_dir, jobs, download_dir / "calendars", pool)
+    ocr_seconds = time.perf_counter() - ocr_start
+
+    _save_json(manifest_path, manifest)
+    report = {
+        "schedules": len(urls),
+        **status,
+        "processed_pages": sum(1 for r in results if r.status == "ok"),
+        "failed_pages": sum(1 for r in results if r.status != "ok"),
+        "crawl_errors": len(crawler.failures),
+        "crawl_seconds": round(crawl_seconds, 2),
+        "download_seconds": round(download_seconds, 2),
+        "ocr_seconds": round(ocr_seconds, 2),
+        "total_seconds": round(time.perf_counter() - start, 2),
+    }
+    _save_json(cache.dir / REPORT_FILE, report)
+    logger.info(f"Odświeżanie harmonogramów zakończone: {report}")
+    return report
+
+
+def _download_if_changed(crawler, api_processor, file_service, url, previous, download_dir):
+    """
+    Zwraca (stan, ścieżka PDF, wpis manifestu); stan: new / changed / unchanged / failed.
+    """
+    pdf_path = download_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.pdf"
+    crawler.throttle()
+    try:
+        response = api_processor.api.get_file_if_modified(url, previous.get("etag"), previous.get("last_modified"))
+        # stream=True – połączenie wraca do puli dopiero po zamknięciu odpowiedzi, także 304 bez treści
+        with response:
+            if response.status_code == 304:
+                return "unchanged", pdf_path, previous
+            file_service.save_downloaded_file(pdf_path, response)
+    except (ApiError, OSError) as e:
+        logger.warning(f"Nie udało się pobrać {url}: {e}")
+        return "failed", None, None
+
+    from garbage.services.PdfService import PdfService
+
+    sha256 = ResultCache.file_digest(pdf_path)
+    _, pages = PdfService(pdf_path).detect_multipage()
+    entry = {
+        "sha256": sha256,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "pages": pages,
+    }
+    # serwer mógł nie obsłużyć zapytania warunkowego – porównujemy treść
+    if previous.get("sha256") == sha256:
+        return "unchanged", pdf_path, entry
+    return ("changed" if previous else "new"), pdf_path, entry
+
+
+def _is_cached(cache, entry, pdf_path):
+    if not pdf_path.exists():
+        # bez lokalnej kopii nie ma czego przetwarzać ponownie
+        return True
+    return all(cache.contains(key, ResultCache.ICS) for key in cache_keys(entry))
+
+
+def cache_keys(entry) -> list[str]:
+    """
+    Klucze ResultCache kolejnych stron harmonogramu z wpisu manifestu. Liczone przy każdym użyciu,
+    nie zapisywane – po zmianie wersji potoku zapisane klucze wskazywałyby nieaktualne wyniki.
+    """
+    return [ResultCache.key_from_digest(entry["sha256"], page) for page in range(entry.get("pages", 0))]
+
+
+def _load_manifest(path):
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    for entry in manifest.values():
+        # manifesty sprzed zmiany zapisywały klucze cache
+        entry.pop("cache_keys", None)
+    return manifest
+
+
+def _save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
@@ -2,36 +2,152 @@ from garbage.services.CalendarService import CalendarService
 from garbage.services.CsvProcessing import CsvProcessing
 from garbage.services.DataProcessor import DataProcessor
 from garbage.services.FileService import FileService
-from garbage.services.ImageProcessingService import ImageProcessingService
-from garbage.services.OcrService import OcrService
-from garbage.services.PdfService import PdfService
+from garbage.services.ResultCache import ResultCache
 
-def process_schedule(base_dir, pdf_path):
-    file_service = FileService(base_dir)
-    year = PdfService(pdf_path).detect_year()
-    header_img, data_img = ImageProcessingService(file_service, pdf_path).process_waste_pdf()
+# OcrService (easyocr/torch), ImageProcessingService (cv2) i PdfService (fitz) importowane są w funkcjach,
+# które ich używają – ścieżka z CSV i trafienia w cache nie płacą za ich import
+
+# etapy OCR zgłaszane przez callback progress (kolejność = postęp)
+CSV_STAGES = {
+    "pdf": "Odczyt PDF",
+    "image": "Przetwarzanie obrazu",
+    "ocr": "Rozpoznawanie tekstu",
+    "csv": "Zapis tabeli",
+}
 
-    header, data = OcrService(file_service, header_img, data_img).process()
+def process_schedule(base_dir, pdf_path, debug_artifacts=False, cell_ocr=False, temporary_directory=None,
+                     calendar_path=None, page_number=0, streaming=False, diff_path=None, recurrence=False,
+                     progress=None, calendar_id=None):
+    """
+    page_number – numer strony PDF z harmonogramem (od 0)
+    temporary_directory – własny katalog plików pośrednich (np. osobny dla każdego zadania wsadowego)
+    calendar_path – ścieżka pliku ICS, domyślnie Eko-Region-<rok>.ics w bieżącym katalogu
+    streaming – zapis ICS strumieniowo (IcsWriter) zamiast przez obiekt icalendar
+    diff_path – plik ICS tylko ze zmianami względem poprzedniej wersji kalendarza
+    recurrence – regularne odbiory zapisane jako serie RRULE (mniejszy plik)
+    progress – jak w process_schedule_to_csv
+    calendar_id – identyfikator harmonogramu w UID (CalendarService.calendar_id_for, np. z URL PDF),
+                  domyślnie ścieżka pliku ICS
+    Zwraca ścieżkę zapisanego kalendarza.
+    """
+    file_service = FileService(base_dir, temporary_directory)
+    cache = ResultCache(file_service)
+    key = ResultCache.key_for(pdf_path, page_number, cell_ocr)
 
-    schedule_csv = CsvProcessing(file_service, header, data).process()
+    # ICS budujemy zawsze z CSV (kosztowny jest tylko OCR) – UID, DTSTAMP i SEQUENCE zależą
+    # od poprzedniej wersji kalendarza w calendar_path, więc gotowego pliku z cache nie kopiujemy
+    schedule_csv, year = _schedule_to_csv(file_service, cache, key, pdf_path, debug_artifacts=debug_artifacts,
+                                          save_preview=False, cell_ocr=cell_ocr, page_number=page_number,
+                                          progress=progress)
 
     data_from_csv = file_service.read_csv(schedule_csv)
     schedule = DataProcessor().map_garbage_data(data_from_csv, year)
-    CalendarService(file_service, schedule).prepare_calendar()
+    calendar_file = CalendarService(file_service, schedule, calendar_id).prepare_calendar(calendar_path, streaming=streaming,
+                                                                              diff_path=diff_path,
+                                                                              recurrence=recurrence)
+    cache.store(key, year, ics=calendar_file)
+    return calendar_file
 
-def process_schedule_to_csv(base_dir, pdf_path):
-    file_service = FileService(base_dir)
-    year = PdfService(pdf_path).detect_year()
-    header_img, data_img = ImageProcessingService(file_service, pdf_path).process_waste_pdf()
-    header, data = OcrService(file_service, header_img, data_img).process()
-    CsvProcessing(file_service, header, data).process()
+def process_schedule_to_csv(base_dir, pdf_path, debug_artifacts=False, save_preview=True, cell_ocr=False,
+                            page_number=0, progress=None, temporary_directory=None):
+    """
+    progress – wywoływana z nazwą etapu (klucz CSV_STAGES) przed jego rozpoczęciem
+    temporary_directory – katalog zadania (FileService.for_job), w nim powstaje CSV i podgląd tabeli
+    """
+    file_service = FileService(base_dir, temporary_directory)
+    cache = ResultCache(file_service)
+    _, year = _schedule_to_csv(file_service, cache, ResultCache.key_for(pdf_path, page_number, cell_ocr), pdf_path,
+                               debug_artifacts=debug_artifacts, save_preview=save_preview, cell_ocr=cell_ocr,
+                               page_number=page_number, progress=progress)
     return year
 
-def process_from_csv(base_dir, csv_path, year: int):
+def _schedule_to_csv(file_service, cache, key, pdf_path, debug_artifacts, save_preview, cell_ocr, page_number,
+                     progress=None):
+    progress = progress or (lambda stage: None)
+    csv_path = file_service.temporary_directory / CsvProcessing.TMP_SUBFOLDER / CsvProcessing.OUTPUT_FILE_NAME
+
+    entry = cache.lookup(key, ResultCache.CSV)
+    if entry:
+        file_service.create_folder(csv_path.parent)
+        file_service.copy_file(entry.file(ResultCache.CSV), csv_path)
+        if save_preview:
+            _restore_preview(file_service, cache, entry, pdf_path, page_number)
+        return csv_path, entry.year
+
+    from garbage.services.PdfService import PdfService
+    from garbage.services.TextLayerService import TextLayerService
+
+    progress("pdf")
+    year = PdfService(pdf_path).detect_year(page_number)
+
+    # PDF z warstwą tekstową: tabela wprost z PDF, bez rasteryzacji i OCR (artefakty debug są tylko w OCR)
+    schedule_csv = None
+    if not debug_artifacts:
+        schedule_csv = TextLayerService(file_service, pdf_path, page_number, save_preview=save_preview).process()
+    if schedule_csv is None:
+        schedule_csv = _ocr_to_csv(file_service, pdf_path, debug_artifacts, save_preview, cell_ocr, page_number,
+                                   progress)
+
+    cache.store(key, year, csv=schedule_csv, preview=_preview_path(file_service) if save_preview else None)
+    return schedule_csv, year
+
+def _ocr_to_csv(file_service, pdf_path, debug_artifacts, save_preview, cell_ocr, page_number, progress):
+    from garbage.services.ImageProcessingService import ImageProcessingService
+    from garbage.services.OcrService import OcrService
+
+    progress("image")
+    header_img, data_img = ImageProcessingService(file_service, pdf_path, debug_artifacts=debug_artifacts,
+                                                  save_preview=save_preview,
+                                                  page_number=page_number).process_waste_pdf()
+    progress("ocr")
+    header, data = OcrService(file_service, header_img, data_img, cell_mode=cell_ocr).process()
+    progress("csv")
+    return CsvProcessing(file_service, header, data).process()
+
+def _restore_preview(file_service, cache, entry, pdf_path, page_number):
+    """
+    Podgląd tabeli przy trafieniu w cache. Wpisy z process_schedule (prewarm, batch, wszystkie strony w web)
+    nie mają podglądu – renderujemy wtedy sam wycinek tabeli, bez OCR, i dopisujemy go do wpisu.
+    """
+    preview_path = _preview_path(file_service)
+    cached_preview = entry.file(ResultCache.PREVIEW)
+    if cached_preview:
+        file_service.create_folder(preview_path.parent)
+        file_service.copy_file(cached_preview, preview_path)
+        return
+
+    from garbage.services.ImageProcessingService import ImageProcessingService
+
+    ImageProcessingService(file_service, pdf_path, save_preview=True, page_number=page_number).save_table_preview()
+    cache.store(entry.key, preview=preview_path)
+
+def _preview_path(file_service):
+    from garbage.services.ImageProcessingService import ImageProcessingService
+
+    return (file_service.temporary_directory / ImageProcessingService.TMP_SUBFOLDER
+            / ImageProcessingService.CROPPED_IMAGE_NAME)
+
+def process_from_csv(base_dir, csv_path, year: int, diff_path=None, recurrence=False, calendar_path=None,
+                     calendar_id=None):
+    """
+    calendar_path – ścieżka pliku ICS, domyślnie Eko-Region-<rok>.ics w bieżącym katalogu
+    calendar_id – identyfikator harmonogramu w UID (jak w process_schedule), domyślnie ścieżka pliku ICS
+    Zwraca ścieżkę zapisanego kalendarza.
+    """
     file_service = FileService(base_dir)
     data_from_csv = file_service.read_csv(csv_path)
     schedule = DataProcessor().map_garbage_data(data_from_csv, year)
-    CalendarService(file_service, schedule).prepare_calendar()
+    return CalendarService(file_service, schedule, calendar_id).prepare_calendar(calendar_path, diff_path=diff_path,
+                                                                    recurrence=recurrence)
+
+def preload_ocr(base_dir):
+    """
+    Tworzy i rozgrzewa współdzielony Reader EasyOCR, zwraca czas startu w sekundach.
+    """
+    from garbage.services.OcrService import OcrService
+
+    OcrService.get_reader(FileService(base_dir))
+    return OcrService.reader_startup_seconds
 
 # TODO: maybe refactor/move somewhere
 def open_pdf(pdf_path):
@@ -39,7 +155,11 @@ def open_pdf(pdf_path):
         return f.read()
 
 def detect_multipage(pdf_path):
+    from garbage.services.PdfService import PdfService
+
     return PdfService(pdf_path).detect_multipage()
 
 def save_selected_page(pdf_path, page_number):
+    from garbage.services.PdfService import PdfService
+
     PdfService(pdf_path).save_selected_page(page_number)
\ No newline at end of file
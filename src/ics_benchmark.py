@@ -0,0 +1,78 @@
+"""
+Zapis kalendarza przez icalendar i strumieniowo przez IcsWriter (CalendarService.prepare_calendar)
+dla sztucznego harmonogramu – czas i szczytowe zużycie pamięci (tracemalloc).
+
+    cd src
+    python ics_benchmark.py                    # 100 000 wydarzeń
+    python ics_benchmark.py --events 10000 --no-memory
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from garbage.model.Garbage import GarbageRegistry
+from garbage.model.Schedule import Schedule
+from garbage.services.CalendarService import CalendarService
+from garbage.services.FileService import FileService
+
+# większość odbiorów bez adnotacji, reszta ze znakami specjalnymi i długimi liniami do zawinięcia
+NOTES = [None, None, None, "* -> możliwa zmiana daty\n", "Odbiór; przesunięty, z powodu święta \\ ąęśćżźółń " * 3]
+
+
+def build_schedule(events, seed=2):
+    rng = random.Random(seed)
+    types = [GarbageRegistry.instances[cls] for cls in GarbageRegistry.registry]
+    schedule = Schedule()
+    # każda para (typ, dzień) tylko raz – powtórzone odbiory mają ten sam UID i CalendarService je pomija
+    for n in range(events):
+        schedule.append(types[n % len(types)], datetime(2025, 1, 1) + timedelta(days=n // len(types)),
+                        rng.choice(NOTES))
+    return schedule
+
+
+def measure(file_service, schedule, path, streaming, memory):
+    """
+    Zwraca (czas w sekundach, szczyt pamięci w MB albo None, rozmiar pliku w MB).
+    """
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    CalendarService(file_service, schedule, "benchmark").prepare_calendar(path, streaming=streaming)
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return seconds, peak, path.stat().st_size / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zapis ICS: icalendar kontra IcsWriter")
+    parser.add_argument("--events", type=int, default=100_000, help="Liczba wydarzeń w harmonogramie.")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Bez tracemalloc (spowalnia oba zapisy, zwłaszcza icalendar).")
+    args = parser.parse_args()
+
+    schedule = build_schedule(args.events)
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        file_service = FileService(directory)
+        results = {}
+        for name, streaming in (("icalendar", False), ("IcsWriter", True)):
+            # osobny plik – inaczej drugi zapis porównywałby się z poprzednią wersją kalendarza
+            results[name] = measure(file_service, schedule, directory / f"{name}.ics", streaming,
+                                    not args.no_memory)
+            seconds, peak, size = results[name]
+            memory = f"{peak:8.1f} MB" if peak is not None else "       -"
+            print(f"{name:<10} {seconds:8.2f} s   pamięć: {memory}   plik: {size:6.1f} MB")
+
+    print(f"IcsWriter {results['icalendar'][0] / results['IcsWriter'][0]:.1f}x szybszy "
+          f"({args.events} wydarzeń)")
+
+
+if __name__ == "__main__":
+    main()
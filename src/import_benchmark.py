@@ -0,0 +1,82 @@
+"""
+Czas importu punktów wejścia (python -X importtime) – pilnuje, by ciężkie biblioteki
+(easyocr/torch, cv2, pandas, fitz, dateparser) ładowały się dopiero wtedy, gdy są potrzebne.
+
+    cd src
+    python import_benchmark.py            # tabela dla wszystkich punktów wejścia
+    python import_benchmark.py --top 15   # dodatkowo najwolniejsze moduły każdego z nich
+"""
+import argparse
+import ast
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+
+def module_imports(path) -> str:
+    """
+    Importy najwyższego poziomu skryptu jako jedna instrukcja – skryptu web.py (streamlit run)
+    nie da się po prostu zaimportować, a ręczna lista rozjeżdżała się z nim po każdej zmianie.
+    """
+    modules = []
+    for node in ast.parse(Path(path).read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return "import " + ", ".join(dict.fromkeys(modules))
+
+
+# importy wykonywane przez dany punkt wejścia zanim zacznie właściwą pracę
+ENTRY_POINTS = {
+    "main.py (parsowanie argumentów)": "import main",
+    "main.py csv": "import main, garbage.services.CalendarService, garbage.services.DataProcessor",
+    "main.py serve": "import main, garbage.services.FeedServer",
+    "main.py file/batch (OCR)": "import main, garbage.services.OcrService, garbage.services.ImageProcessingService, "
+                                "garbage.services.PdfService, garbage.services.CsvProcessing",
+    # web.py (streamlit run) wykonuje przy każdym uruchomieniu wszystkie importy najwyższego poziomu
+    "web.py (pierwszy ekran)": module_imports(Path(__file__).with_name("web.py")),
+}
+HEAVY_MODULES = ("easyocr", "torch", "cv2", "pandas", "fitz", "dateparser", "icalendar", "PIL", "numpy")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(statement):
+    """
+    Zwraca (łączny czas importu w ms, lista ciężkich modułów, najwolniejsze moduły) albo błąd.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, [], [result.stderr.strip().splitlines()[-1]]
+
+    modules = []
+    for match in _LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        modules.append((int(cumulative) / 1000, len(indent), name))
+    # moduły najwyższego poziomu (najmniejsze wcięcie) sumują się do całego importu
+    top_level = min(indent for _, indent, _ in modules)
+    total = sum(ms for ms, indent, _ in modules if indent == top_level)
+    heavy = [name for name in HEAVY_MODULES if any(module == name for _, _, module in modules)]
+    slowest = [f"{ms:8.1f} ms  {name}" for ms, _, name in sorted(modules, reverse=True)]
+    return total, heavy, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Czas importu punktów wejścia CLI i aplikacji web")
+    parser.add_argument("--top", type=int, default=0, help="Pokaż N najwolniejszych modułów dla każdego wejścia.")
+    args = parser.parse_args()
+
+    for name, statement in ENTRY_POINTS.items():
+        total, heavy, slowest = measure(statement)
+        if total is None:
+            print(f"{name:<34} błąd: {slowest[0]}")
+            continue
+        print(f"{name:<34} {total:8.1f} ms   ciężkie: {', '.join(heavy) or '-'}")
+        for line in slowest[:args.top]:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,10 @@ def main():
     from garbage.services.process import process_schedule
     BASE_DIR = Path(__file__).resolve().parents[1]  # przejście: main.py → garbage → src → projekt
     parser = argparse.ArgumentParser(description="Eko-region harmonogram")
+    parser.add_argument("--debug-artifacts", action="store_true",
+                        help="Zapisuj obrazy z każdego etapu przetwarzania do resources/tmp/image.")
+    parser.add_argument("--cell-ocr", action="store_true",
+                        help="Odczytuj dane komórka po komórce na podstawie linii tabeli (bez detekcji tekstu).")
 
     sub = parser.add_subparsers(dest="command", required=False)
 
@@ -37,27 +41,100 @@ def main():
     # podaj własną ścieżkę pliku
     parser_own_file = sub.add_parser("file", help="Uruchom skrypt z własnym plikiem")
     parser_own_file.add_argument("--path", required=True, help="Ścieżka do pliku z harmonogramem (.pdf).")
+    parser_own_file.add_argument("--diff", type=str, default=None,
+                                 help="Zapisz też plik ICS tylko ze zmianami względem poprzedniego kalendarza.")
+    parser_own_file.add_argument("--rrule", action="store_true",
+                                 help="Zapisz regularne odbiory jako wydarzenia cykliczne (RRULE).")
+    parser_own_file.add_argument("--calendar-id", type=str, default=None,
+                                 help="Identyfikator harmonogramu w UID wydarzeń (domyślnie ścieżka pliku ICS). "
+                                      "Podaj ten sam dla kolejnych wersji harmonogramu, by zachować UID.")
+    parser_own_file.add_argument("--all-pages", action="store_true",
+                                 help="Przetwórz równolegle wszystkie strony PDF (jeden plik ICS na stronę "
+                                      "i raport batch_report.json w katalogu --output).")
+    parser_own_file.add_argument("--output", type=str, default=".",
+                                 help="Katalog na pliki ICS stron przy --all-pages (domyślnie bieżący).")
+    parser_own_file.add_argument("--workers", type=int, default=None,
+                                 help="Liczba procesów przy --all-pages (domyślnie liczba rdzeni).")
 
     # poprawienie CSV
     parser_csv = sub.add_parser("csv", help="Uruchom skrypt z poprawioną tabelą harmonogramu")
     parser_csv.add_argument("--path", required=True, type=str, help="Ścieżka do pliku z CSV harmonogramu.")
     parser_csv.add_argument("--year", required=True, type=int, help="Rok dla którego jest harmonogram.")
+    parser_csv.add_argument("--calendar-id", type=str, default=None,
+                            help="Identyfikator harmonogramu w UID wydarzeń (domyślnie ścieżka pliku ICS). "
+                                 "Podaj ten sam dla kolejnych wersji harmonogramu, by zachować UID.")
+    parser_csv.add_argument("--diff", type=str, default=None,
+                            help="Zapisz też plik ICS tylko ze zmianami względem poprzedniego kalendarza.")
+    parser_csv.add_argument("--rrule", action="store_true",
+                            help="Zapisz regularne odbiory jako wydarzenia cykliczne (RRULE).")
+
+    # przetwarzanie wsadowe
+    parser_batch = sub.add_parser("batch", help="Przetwórz równolegle wiele plików PDF")
+    parser_batch.add_argument("--input", required=True, type=str,
+                              help="Katalog z plikami PDF lub plik manifestu (jedna ścieżka PDF w linii).")
+    parser_batch.add_argument("--output", required=True, type=str,
+                              help="Katalog na pliki ICS i raport batch_report.json.")
+    parser_batch.add_argument("--workers", type=int, default=None,
+                              help="Liczba procesów (domyślnie liczba rdzeni).")
+    parser_batch.add_argument("--memory-limit", type=int, default=None,
+                              help="Pamięć (RSS) na proces w MB: ogranicza liczbę procesów do pamięci maszyny, "
+                                   "procesy są okresowo zastępowane nowymi, a przekroczenia trafiają do raportu.")
+
+    # indeks wszystkich harmonogramów
+    parser_crawl = sub.add_parser("crawl", help="Zbuduj indeks adres -> plik harmonogramu z eko-region.pl")
+    parser_crawl.add_argument("--output", required=True, type=str, help="Ścieżka pliku JSON z indeksem.")
+    parser_crawl.add_argument("--workers", type=int, default=8, help="Liczba równoległych zapytań.")
+    parser_crawl.add_argument("--delay", type=float, default=0.2, help="Minimalny odstęp między zapytaniami (s).")
+
+    # wstępne przetworzenie wszystkich opublikowanych harmonogramów
+    parser_prewarm = sub.add_parser("prewarm", help="Pobierz nowe/zmienione harmonogramy i przetwórz je do cache")
+    parser_prewarm.add_argument("--workers", type=int, default=None, help="Liczba procesów OCR.")
+    parser_prewarm.add_argument("--download-workers", type=int, default=8, help="Liczba równoległych pobrań.")
+    parser_prewarm.add_argument("--delay", type=float, default=0.2, help="Minimalny odstęp między zapytaniami (s).")
+
+    # serwer subskrypcji kalendarzy z cache
+    parser_serve = sub.add_parser("serve", help="Udostępnij kalendarze z cache jako subskrypcje (webcal)")
+    parser_serve.add_argument("--host", type=str, default="0.0.0.0", help="Adres nasłuchiwania.")
+    parser_serve.add_argument("--port", type=int, default=8080, help="Port HTTP.")
 
     args = parser.parse_args()
 
-    if args.command == "file":
-        process_schedule(BASE_DIR, args.path)
+    if args.command == "file" and args.all_pages:
+        if args.diff or args.rrule:
+            parser.error("--all-pages nie obsługuje --diff ani --rrule")
+        from garbage.services.batch import process_pages
+        process_pages(BASE_DIR, args.path, args.output, workers=args.workers, cell_ocr=args.cell_ocr,
+                      calendar_id=args.calendar_id)
+    elif args.command == "file":
+        process_schedule(BASE_DIR, args.path, debug_artifacts=args.debug_artifacts, cell_ocr=args.cell_ocr,
+                         diff_path=args.diff, recurrence=args.rrule, calendar_id=args.calendar_id)
     elif args.command == "csv":
-        process_from_csv(BASE_DIR, args.path, args.year)
+        process_from_csv(BASE_DIR, args.path, args.year, diff_path=args.diff, recurrence=args.rrule,
+                         calendar_id=args.calendar_id)
+    elif args.command == "crawl":
+        from garbage.services.ApiProcessor import ApiProcessor
+        from garbage.services.Crawler import Crawler
+        from garbage.services.FileService import FileService
+        crawler = Crawler(ApiProcessor(FileService(BASE_DIR)), max_workers=args.workers, delay=args.delay)
+        Crawler.save_index(crawler.crawl(), args.output)
+    elif args.command == "prewarm":
+        from garbage.services.prewarm import prewarm_schedules
+        prewarm_schedules(BASE_DIR, workers=args.workers, download_workers=args.download_workers, delay=args.delay)
+    elif args.command == "serve":
+        from garbage.services.FeedServer import serve_feeds
+        serve_feeds(BASE_DIR, host=args.host, port=args.port)
+    elif args.command == "batch":
+        from garbage.services.batch import process_batch
+        process_batch(BASE_DIR, args.input, args.output, workers=args.workers, memory_limit_mb=args.memory_limit,
+                      cell_ocr=args.cell_ocr)
     else:
         # pdf_path = BASE_DIR / "resources" / "Pabianice-Gmina-7.pdf"
         # pdf_path = BASE_DIR / "resources" / "brzeznio_10.pdf"
         pdf_path = BASE_DIR / "resources" / "Dobron_8.pdf"
         # pdf_path = BASE_DIR / "resources" / "pabianice.pdf"
-        process_schedule(BASE_DIR, pdf_path)
+        process_schedule(BASE_DIR, pdf_path, debug_artifacts=args.debug_artifacts, cell_ocr=args.cell_ocr)
 
 
-#TODO: add debug mode
 #TODO: move this to subfile -> here only invoke 1 method
 if __name__ == '__main__':
     main()
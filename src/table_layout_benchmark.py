@@ -0,0 +1,114 @@
+"""
+Składanie tabeli z fragmentów OCR: TableLayout (NumPy) kontra dawne pętle z OcrService.process_table_image
+(grupowanie wierszy, najbliższa kolumna przez argmin dla każdego elementu, scalanie komórek).
+Dane syntetyczne w układzie harmonogramu, bez easyocr – mierzony jest tylko układ tabeli.
+
+    cd src
+    python table_layout_benchmark.py                  # 12 / 40 / 150 wierszy
+    python table_layout_benchmark.py --rows 400 --columns 12
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from garbage.services.TableLayout import TableLayout
+
+TOLERANCE_Y = 35
+TOLERANCE_X = 80
+
+
+def synthetic_boxes(rows, columns, seed=5):
+    """
+    Ramki jak z easyocr: 0–3 fragmenty na komórkę (np. '3 i 17' w dwóch liniach), lekko przesunięte.
+    """
+    rng = random.Random(seed)
+    texts, boxes = [], []
+    for row in range(rows):
+        for column in range(columns):
+            for fragment in range(rng.randint(0, 3)):
+                line, part = divmod(fragment, 2)
+                x = 40 + column * 120 + part * 34 + rng.gauss(0, 3)
+                y = 30 + row * 90 + line * 20 + rng.gauss(0, 3)
+                texts.append(str(rng.randint(1, 31)))
+                boxes.append([[x, y], [x + 28, y], [x + 28, y + 14], [x, y + 14]])
+    return texts, boxes
+
+
+def legacy_layout(texts, boxes):
+    """
+    Układ tabeli sprzed TableLayout (OcrService.process_table_image, bez OCR i zapisu CSV).
+    """
+    elements = []
+    for bbox, text in zip(boxes, texts):
+        elements.append({"text": text, "x": np.mean([p[0] for p in bbox]), "y": max(p[1] for p in bbox)})
+
+    elements.sort(key=lambda e: (round(e["y"] / 5), e["x"]))
+    rows, current_row, last_y = [], [], None
+    for el in elements:
+        if last_y is None or abs(el["y"] - last_y) < TOLERANCE_Y:
+            current_row.append(el)
+        else:
+            rows.append(current_row)
+            current_row = [el]
+        last_y = el["y"]
+    if current_row:
+        rows.append(current_row)
+
+    all_x = sorted(e["x"] for e in elements)
+    col_groups, cur = [], [all_x[0]]
+    for x in all_x[1:]:
+        if abs(x - cur[-1]) < TOLERANCE_X:
+            cur.append(x)
+        else:
+            col_groups.append(cur)
+            cur = [x]
+    col_groups.append(cur)
+    col_centers = [np.mean(g) for g in col_groups]
+
+    final_rows = []
+    for row in rows:
+        cols = {i: [] for i in range(len(col_centers))}
+        for el in row:
+            cols[np.argmin([abs(el["x"] - c) for c in col_centers])].append(el)
+        final_rows.append([" ".join(e["text"] for e in sorted(cols[i], key=lambda e: (e["y"], e["x"])))
+                           for i in range(len(col_centers))])
+    return final_rows
+
+
+def vectorised_layout(texts, boxes):
+    xs, ys = TableLayout.anchor_points(boxes, anchor="baseline")
+    return TableLayout(TOLERANCE_Y, TOLERANCE_X).build(texts, xs, ys)
+
+
+def best_of(function, *args, repeat=5):
+    """
+    Najkrótszy z kilku przebiegów (ms) i wynik ostatniego.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Układ tabeli OCR: TableLayout kontra dawne pętle")
+    parser.add_argument("--rows", type=int, nargs="+", default=[12, 40, 150], help="Liczby wierszy tabeli.")
+    parser.add_argument("--columns", type=int, default=8, help="Liczba kolumn (typów odpadów + miesiąc).")
+    parser.add_argument("--repeat", type=int, default=5, help="Liczba przebiegów, liczy się najkrótszy.")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        texts, boxes = synthetic_boxes(rows, args.columns)
+        legacy_ms, legacy = best_of(legacy_layout, texts, boxes, repeat=args.repeat)
+        vectorised_ms, vectorised = best_of(vectorised_layout, texts, boxes, repeat=args.repeat)
+        same = "tak" if legacy == vectorised else "NIE"
+        print(f"{len(texts):6d} fragmentów   dawny układ {legacy_ms:8.2f} ms   TableLayout {vectorised_ms:7.2f} ms   "
+              f"{legacy_ms / vectorised_ms:5.1f}x   ten sam wynik: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,27 @@
 import os
+import time
+import uuid
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 
 from garbage.services.ApiProcessor import ApiProcessor
+from garbage.services.CalendarService import CalendarService
 from garbage.services.CsvProcessing import CsvProcessing
 from garbage.services.FileService import FileService
-from garbage.services.ImageProcessingService import ImageProcessingService
-from garbage.services.process import process_schedule_to_csv, process_from_csv, detect_multipage, open_pdf, \
-    save_selected_page
+from garbage.services.JobJanitor import JobJanitor
+from garbage.services.JobManager import JobManager, JobRejected
+from garbage.services.LookupCache import LookupCache
+from garbage.services.ResultCache import ResultCache
+from garbage.services.process import CSV_STAGES, process_from_csv, detect_multipage, open_pdf
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 RESOURCES_DIR = BASE_DIR / "resources"
-RESOURCES_TMP_DIR = RESOURCES_DIR / "tmp"
+# co ile sekund ekran OCR odpytuje stan zadania
+JOB_POLL_SECONDS = 1
+# limit zadań jednej sesji przy przetwarzaniu wszystkich stron – pozostałe strony zgłaszane w miarę postępu,
+# by jeden wielostronicowy PDF nie zajął całej kolejki przed innymi użytkownikami
+PAGE_JOBS_PER_SESSION = 2
 
 file_service = FileService(BASE_DIR)
 
@@ -22,35 +30,58 @@ processing_status = "start"
 st.title("OCR Harmonogramu Eko-Region")
 st.set_page_config(layout="wide")
 
+@st.cache_resource
+def get_job_manager():
+    # wspólna dla wszystkich sesji kolejka OCR; procesy ładują Reader EasyOCR w tle, nie blokując pierwszego renderu
+    job_manager = JobManager(BASE_DIR)
+    job_manager.warm_up()
+    return job_manager
+
+get_job_manager()
+
 # --- inicjalizacja stanu ---
 if "step" not in st.session_state:
     st.session_state.step = 1
+if "job_id" not in st.session_state:
+    st.session_state.job_id = uuid.uuid4().hex
+    # nowa sesja – okazja, by usunąć katalogi porzuconych sesji
+    JobJanitor(BASE_DIR).sweep_if_due(keep={st.session_state.job_id})
+
+# pliki sesji (PDF, CSV, podgląd, ICS) we własnym katalogu – równoległe sesje nie nadpisują sobie plików
+job_files = FileService.for_job(BASE_DIR, st.session_state.job_id)
+JobJanitor.touch(job_files)
+
+@st.cache_resource
+def get_lookup_cache():
+    # wspólny dla wszystkich sesji i trwały między restartami
+    return LookupCache(RESOURCES_DIR / LookupCache.DB_FILE)
 
-@st.cache_data
 def get_community_cached():
-    return api_processor.get_community()
+    return get_lookup_cache().get("community", api_processor.get_community)
 
 def get_cities_cached(community_url):
-    key = f"cities_{community_url}"
-    if key not in st.session_state:
-        with st.spinner(f"Pobieranie listy miejscowości..."):
-            st.session_state[key] = api_processor.get_city(community_url)
-    return st.session_state[key]
+    with st.spinner(f"Pobieranie listy miejscowości..."):
+        return get_lookup_cache().get(f"cities_{community_url}", lambda: api_processor.get_city(community_url))
 
 def get_streets_cached(city_url):
-    key = f"streets_{city_url}"
-    if key not in st.session_state:
-        with st.spinner(f"Pobieranie ulic..."):
-            st.session_state[key] = api_processor.get_streets(city_url)
-    return st.session_state[key]
+    with st.spinner(f"Pobieranie ulic..."):
+        return get_lookup_cache().get(f"streets_{city_url}", lambda: api_processor.get_streets(city_url))
+
+def schedule_calendar_id(page_number):
+    # UID z URL harmonogramu (jak w prewarm) – nowa wersja PDF dla adresu zmienia tylko przesunięte odbiory;
+    # wgrany plik nie ma stałego źródła, zostaje skrót treści
+    if st.session_state.get("schedule_url"):
+        return CalendarService.calendar_id_for(st.session_state.schedule_url, page_number)
+    return ResultCache.schedule_id(ResultCache.file_digest(INPUT_FILE_PATH), page_number)
 
 # ============================================================
 # KROK 1 – wgrywanie pliku
 # ============================================================
-INPUT_FILE_DIR = RESOURCES_TMP_DIR / "input"
+INPUT_FILE_DIR = job_files.temporary_directory / "input"
 file_service.create_folder(INPUT_FILE_DIR)
 target_filename = "Harmonogram.pdf"
 INPUT_FILE_PATH = Path(INPUT_FILE_DIR).joinpath(target_filename)
+CALENDARS_DIR = job_files.temporary_directory / "calendars"
 
 tab1, tab2, tab3 = st.tabs([
     "📁 Wgraj plik",
@@ -65,6 +96,7 @@ if st.session_state.step == 1:
 
         if uploaded_file:
             file_service.save_file(INPUT_FILE_PATH, uploaded_file)
+            st.session_state.schedule_url = None
             st.session_state.step = 2
             st.success("Plik wgrany ✔️")
             st.rerun()
@@ -78,6 +110,7 @@ if st.session_state.step == 1:
 
             try:
                 api_processor.get_file_from_url(url, INPUT_FILE_PATH)
+                st.session_state.schedule_url = url
                 st.success(f"Pobrano plik ✔️")
                 st.session_state.step = 2
                 st.rerun()
@@ -170,6 +203,7 @@ if st.session_state.step == 1:
             if st.button(f"Pobierz: {name}"):
                 try:
                     api_processor.get_file_from_url(st.session_state.download_url, INPUT_FILE_PATH)
+                    st.session_state.schedule_url = st.session_state.download_url
                     st.success("Pobrano plik ✔️")
                     st.session_state.step = 2
                     st.rerun()
@@ -196,10 +230,17 @@ if st.session_state.step == 2 and file_service.file_exists(INPUT_FILE_PATH):
             value=1
         )
         if st.button("Zapisz wybraną stronę"):
-            save_selected_page(INPUT_FILE_PATH, page_number)
+            st.session_state.page_number = page_number - 1
             st.session_state.step = 3
             st.rerun()
+        if st.button("⚡ Przetwórz wszystkie strony"):
+            # strony trafiają do kolejki JobManager w kroku 6 (po jednym zadaniu na stronę)
+            st.session_state.pending_pages = list(range(num_of_pages))
+            st.session_state.page_jobs = {}
+            st.session_state.step = 6
+            st.rerun()
     else:
+        st.session_state.page_number = 0
         st.session_state.step = 3
         st.rerun()
 
@@ -208,22 +249,47 @@ if st.session_state.step == 2 and file_service.file_exists(INPUT_FILE_PATH):
 # KROK 3 – przetwarzanie
 # ============================================================
 if st.session_state.step == 3 and file_service.file_exists(INPUT_FILE_PATH):
-    if st.button("Rozpocznij OCR"):
-        st.info("⏳ Przetwarzanie w toku...")
-
-        st.session_state.year = process_schedule_to_csv(BASE_DIR, INPUT_FILE_DIR / target_filename)
-        print(f"YEAR: {st.session_state.year}")
+    # OCR działa w puli procesów JobManager – skrypt sesji tylko odpytuje stan zadania
+    job_manager = get_job_manager()
+    job = job_manager.status(st.session_state.get("ocr_job"))
 
+    if job is None or job.status == "cancelled":
+        if st.button("Rozpocznij OCR"):
+            try:
+                st.session_state.ocr_job = job_manager.submit(INPUT_FILE_PATH, st.session_state.get("page_number", 0),
+                                                              temporary_directory=job_files.temporary_directory)
+                st.rerun()
+            except JobRejected as e:
+                st.warning(f"⏳ {e}")
+    elif job.status == "done":
+        st.session_state.year = job.year
+        st.session_state.ocr_job = None
         st.success("Przetwarzanie zakończone!")
         st.session_state.step = 4
         st.rerun()  # odśwież ekran, aby wykryć nowy plik
+    elif job.status == "error":
+        st.error(f"Błąd przetwarzania: {job.error}")
+        if st.button("Spróbuj ponownie"):
+            st.session_state.ocr_job = None
+            st.rerun()
+    else:
+        if job.status == "queued":
+            st.progress(0.0, text=f"⏳ W kolejce (zadań przed Tobą: {job_manager.queue_position(job.id)})")
+        else:
+            st.progress(job.progress, text=f"⏳ {CSV_STAGES[job.stage]}...")
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
 # ============================================================
 # KROK 4 – porównywanie i edycja
 # ============================================================
 if st.session_state.step == 4:
-    CSV_PATH = RESOURCES_TMP_DIR / CsvProcessing.TMP_SUBFOLDER / "harmonogram.csv"
-    IMAGE_PATH = RESOURCES_TMP_DIR / ImageProcessingService.TMP_SUBFOLDER
+    # pandas i cv2 (przez ImageProcessingService) dopiero na ekranie edycji – nie spowalniają startu aplikacji
+    import pandas as pd
+    from garbage.services.ImageProcessingService import ImageProcessingService
+
+    CSV_PATH = job_files.temporary_directory / CsvProcessing.TMP_SUBFOLDER / CsvProcessing.OUTPUT_FILE_NAME
+    IMAGE_PATH = job_files.temporary_directory / ImageProcessingService.TMP_SUBFOLDER
     st.text(
         """
             Porównaj dane z tabeli wejściowej z odczytaną tabelą przez program. 
@@ -236,7 +302,11 @@ if st.session_state.step == 4:
         col1, col2 = st.columns([1, 1])
         with col1:
             st.subheader("Źródło")
-            st.image(IMAGE_PATH / ImageProcessingService.CROPPED_IMAGE_NAME)
+            preview_path = IMAGE_PATH / ImageProcessingService.CROPPED_IMAGE_NAME
+            if os.path.exists(preview_path):
+                st.image(preview_path)
+            else:
+                st.info("Podgląd tabeli niedostępny – porównaj dane z plikiem PDF.")
 
         with col2:
             st.subheader("📊 Wynik przetwarzania")
@@ -252,8 +322,11 @@ if st.session_state.step == 4:
             edited_df = st.data_editor(df, num_rows="fixed", height=table_height, width="stretch", hide_index=True)
 
         if st.button("💾 Zapisz zmiany i procesuj dalej"):
-            edited_df.to_csv(CSV_PATH, sep=";", index=False)
-            process_from_csv(BASE_DIR, CSV_PATH, st.session_state.year)
+            job_files.save_df_to_csv(CSV_PATH, edited_df, index=False, header=True, sep=";")
+            st.session_state.ics_path = process_from_csv(
+                BASE_DIR, CSV_PATH, st.session_state.year,
+                calendar_id=schedule_calendar_id(st.session_state.get("page_number", 0)),
+                calendar_path=job_files.temporary_directory / CalendarService.file_name_for(st.session_state.year))
             st.success("Przetwarzanie zakończone!")
             st.session_state.step = 5
             st.rerun()
@@ -262,14 +335,12 @@ if st.session_state.step == 4:
 # KROK 5 – generowanie i pobieranie pliku ICS
 # ============================================================
 if st.session_state.step == 5:
-    #TODO: inna ścieżka do trzymania .ics
-    ICS_PATH = BASE_DIR / "src"
-    ics_file = file_service.find_by_pattern(ICS_PATH, "*.ics")[0].name  # TODO: co jak nie ma ?
+    ics_path = st.session_state.get("ics_path")
 
-    if os.path.exists(ics_file):
+    if ics_path and file_service.file_exists(ics_path):
+        ics_file = Path(ics_path).name
         st.success(f"Plik `{ics_file}` jest gotowy do pobrania!")
-        with open(ICS_PATH / ics_file, "rb") as f:
-            ics_bytes = f.read()
+        ics_bytes = file_service.read_ics(ics_path)
 
         st.download_button(
             label=f"⬇️ Pobierz {ics_file}",
@@ -278,13 +349,77 @@ if st.session_state.step == 5:
             mime="text/calendar"
         )
         st.session_state.step = 1
+    else:
+        st.error("Nie znaleziono pliku kalendarza, przetwórz harmonogram ponownie.")
+        st.session_state.step = 1
+
 
+# ============================================================
+# KROK 6 – pobieranie kalendarzy dla wszystkich stron
+# ============================================================
+if st.session_state.step == 6:
+    job_manager = get_job_manager()
+    page_jobs = st.session_state.get("page_jobs", {})
+    pending_pages = st.session_state.get("pending_pages", [])
+    pages = {page: job_manager.status(job_id) for page, job_id in page_jobs.items()}
+
+    # kolejne strony zgłaszane, gdy zwolni się miejsce – każda liczona do limitu zadań JobManager
+    active = sum(1 for job in pages.values() if job is not None and job.active)
+    file_service.create_folder(CALENDARS_DIR)
+    while pending_pages and active < PAGE_JOBS_PER_SESSION:
+        page = pending_pages[0]
+        try:
+            page_jobs[page] = job_manager.submit(
+                INPUT_FILE_PATH, page,
+                temporary_directory=job_files.temporary_directory / "pages" / str(page),
+                calendar_path=CALENDARS_DIR / f"{INPUT_FILE_PATH.stem}-{page + 1}.ics",
+                calendar_id=schedule_calendar_id(page))
+        except JobRejected as e:
+            st.warning(f"⏳ {e}")
+            break
+        pending_pages.pop(0)
+        pages[page] = job_manager.status(page_jobs[page])
+        active += 1
+
+    total = len(pages) + len(pending_pages)
+    finished = [page for page, job in pages.items() if job is None or not job.active]
+    if len(finished) < total:
+        st.progress(len(finished) / total, text=f"⏳ Przetworzono {len(finished)} z {total} stron...")
+
+    for page in sorted(finished):
+        job = pages[page]
+        if job is not None and job.status == "done":
+            with open(job.output, "rb") as f:
+                ics_bytes = f.read()
+            st.download_button(
+                label=f"⬇️ Strona {page + 1}: {Path(job.output).name}",
+                data=ics_bytes,
+                file_name=Path(job.output).name,
+                mime="text/calendar",
+                key=f"page_ics_{page}"
+            )
+        elif job is not None and job.status == "error":
+            st.error(f"Strona {page + 1}: błąd przetwarzania ({job.error})")
+        else:
+            st.error(f"Strona {page + 1}: zadanie przerwane, przetwórz PDF ponownie.")
+
+    if len(finished) < total:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
-#TODO: wyczyść pliki tymczasowe
 
 # ============================================================
 # Inne Elementy
 # ============================================================
 if st.button("Do początku"):
+    if st.session_state.get("ocr_job"):
+        get_job_manager().cancel(st.session_state.ocr_job)
+        st.session_state.ocr_job = None
+    for job_id in st.session_state.pop("page_jobs", {}).values():
+        get_job_manager().cancel(job_id)
+    st.session_state.pop("pending_pages", None)
+    st.session_state.pop("schedule_url", None)
+    # nowy katalog sesji, poprzedni usunie JobJanitor
+    st.session_state.pop("job_id", None)
     st.session_state.step = 1
     st.rerun()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# moduły aplikacji importowane jak w src/main.py (import garbage...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
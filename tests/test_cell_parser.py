@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from garbage.services.CellParser import fix_ocr_text, parse_cell
+
+CORPUS = json.loads((Path(__file__).parent / "data" / "cell_parser_corpus.json").read_text(encoding="utf-8"))
+CASES = CORPUS["cases"]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[repr(case["text"]) for case in CASES])
+def test_parser_matches_previous_implementation(case):
+    assert fix_ocr_text(case["text"]) == case["fixed"]
+
+    if "error" in case:
+        with pytest.raises(ValueError):
+            parse_cell(case["text"])
+        return
+    parsed = parse_cell(case["text"])
+    assert (None if parsed is None else [list(parsed[0]), list(parsed[1])]) == case["parsed"]
+
+
+def test_negative_numbers_are_not_days():
+    # '-' sklejony z dniem nie może trafić jako dzień ujemny do dateparsera
+    with pytest.raises(ValueError):
+        parse_cell("-5118 1  141")
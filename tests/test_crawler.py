@@ -0,0 +1,109 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from garbage.model.EkoRegion import AddressEntry, ResponseData
+from garbage.services.ApiProcessor import ApiProcessor
+from garbage.services.ApiService import ApiResponseError, ApiService
+from garbage.services.Crawler import Crawler
+from garbage.services.FileService import FileService
+
+PAGES_DIR = Path(__file__).parent / "data" / "eko_region"
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Strony z tests/data/eko_region: /gmina-a/miasto-a/ -> gmina-a/miasto-a.html,
+    z {base_url} w linkach zamienionym na adres serwera testowego.
+    """
+
+    def do_GET(self):
+        page = PAGES_DIR / (self.path.strip("/") + ".html")
+        if not page.is_file():
+            self.send_error(404)
+            return
+        body = page.read_text(encoding="utf-8").replace("{base_url}", self.server.base_url).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawler(base_url, tmp_path):
+    api = ApiService(base_url=base_url, retries=0)
+    return Crawler(ApiProcessor(FileService(tmp_path), api), max_workers=4, delay=0)
+
+
+def test_crawl_builds_address_index(crawler, base_url):
+    pdf = f"{base_url}/pdf"
+
+    entries = crawler.crawl()
+
+    assert entries == [
+        AddressEntry("Gmina A", "Miasto A", "ul. Długa",
+                     ResponseData("ul. Długa", f"{pdf}/miasto-a-1-zamieszkale.pdf",
+                                  f"{pdf}/miasto-a-niezamieszkale.pdf")),
+        AddressEntry("Gmina A", "Miasto A", "ul. Krótka",
+                     ResponseData("ul. Krótka", f"{pdf}/miasto-a-2-zamieszkale.pdf",
+                                  f"{pdf}/miasto-a-niezamieszkale.pdf")),
+        # "#" zamiast linku – brak harmonogramu
+        AddressEntry("Gmina A", "Wieś Dolna", None,
+                     ResponseData("Wieś Dolna", f"{pdf}/wies-dolna-zamieszkale.pdf", None)),
+        AddressEntry("Gmina A", "Wieś Górna", None,
+                     ResponseData("Wieś Górna", f"{pdf}/wies-gorna-zamieszkale.pdf",
+                                  f"{pdf}/wies-gorna-niezamieszkale.pdf")),
+        # strona gminy od razu z listą ulic
+        AddressEntry("Gmina B", "Osiedle Słoneczne", None,
+                     ResponseData("Osiedle Słoneczne", f"{pdf}/gmina-b-zamieszkale.pdf", None)),
+    ]
+    assert Crawler.schedule_urls(entries) == {
+        f"{pdf}/miasto-a-1-zamieszkale.pdf",
+        f"{pdf}/miasto-a-2-zamieszkale.pdf",
+        f"{pdf}/miasto-a-niezamieszkale.pdf",
+        f"{pdf}/wies-dolna-zamieszkale.pdf",
+        f"{pdf}/wies-gorna-zamieszkale.pdf",
+        f"{pdf}/wies-gorna-niezamieszkale.pdf",
+        f"{pdf}/gmina-b-zamieszkale.pdf",
+    }
+
+
+def test_crawl_records_failures_and_keeps_going(crawler):
+    entries = crawler.crawl()
+
+    # brakująca gmina i brakująca lista ulic miasta nie przerywają indeksowania
+    assert {entry.community for entry in entries} == {"Gmina A", "Gmina B"}
+    assert "Miasto B" not in {entry.city for entry in entries}
+    assert sorted(source for source, _ in crawler.failures) == ["Gmina A/Miasto B", "Gmina Usunięta"]
+    assert all(ApiResponseError.__name__ in error and "404" in error for _, error in crawler.failures)
+
+
+def test_save_index_round_trip(crawler, tmp_path):
+    entries = crawler.crawl()
+    path = tmp_path / "address_index.json"
+
+    Crawler.save_index(entries, path)
+
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert [(e["community"], e["city"], e["street"]) for e in saved] == \
+        [(e.community, e.city, e.street) for e in entries]
+    assert saved[0]["schedule"]["inhabited"] == entries[0].inhabited
@@ -0,0 +1,61 @@
+import calendar
+from datetime import datetime
+
+import dateparser
+import pytest
+
+from garbage.model.Garbage import Bio, GarbageRegistry, Mixed
+from garbage.services.DataProcessor import OCR_MONTH_VARIANTS, POLISH_MONTHS, DataProcessor
+
+MONTH_NAMES = [(number, name) for number, names in POLISH_MONTHS.items() for name in names]
+YEARS = [2024, 2025]  # rok przestępny i zwykły – 29 lutego
+
+
+def _days(year, month):
+    return [1, 15, calendar.monthrange(year, month)[1]]
+
+
+@pytest.mark.parametrize("year", YEARS)
+@pytest.mark.parametrize("month, name", MONTH_NAMES)
+def test_month_names_match_dateparser(month, name, year):
+    processor = DataProcessor()
+    for day in _days(year, month):
+        for spelling in (name, name.capitalize(), name.upper(), f" {name} "):
+            expected = dateparser.parse(f"{day} {spelling} {year}")
+            assert expected == datetime(year, month, day)
+            assert processor._parse_date(day, spelling, year) == expected
+
+
+@pytest.mark.parametrize("variant, name", sorted(OCR_MONTH_VARIANTS.items()))
+def test_ocr_variants_give_the_corrected_month(variant, name):
+    processor = DataProcessor()
+    for day in (1, 28):
+        assert processor._parse_date(day, variant.capitalize(), 2025) == dateparser.parse(f"{day} {name} 2025")
+
+
+@pytest.mark.parametrize("day, month", [
+    (31, "kwietnia"),   # dzień spoza miesiąca
+    (30, "luty"),
+    ("5a", "maja"),     # dzień z nieusuniętymi znakami
+    (3, "brak"),        # nazwa spoza tablicy
+    (3, "May"),
+])
+def test_fallback_matches_dateparser(day, month):
+    assert DataProcessor()._parse_date(day, month, 2025) == dateparser.parse(f"{day} {month} 2025")
+
+
+def test_map_garbage_data_dates():
+    data = [
+        {"Miesiąc": "Styczeń", "Zmieszane": "7 i 21", "Bio": "9"},
+        {"Miesiąc": "Iuty", "Zmieszane": "4", "Bio": ""},
+    ]
+
+    schedule = DataProcessor().map_garbage_data(data, 2025)
+
+    mixed, bio = GarbageRegistry.instances[Mixed], GarbageRegistry.instances[Bio]
+    assert [(entry.garbage_type, entry.date) for entry in schedule] == [
+        (mixed, datetime(2025, 1, 7)),
+        (mixed, datetime(2025, 1, 21)),
+        (bio, datetime(2025, 1, 9)),
+        (mixed, datetime(2025, 2, 4)),
+    ]
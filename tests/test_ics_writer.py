@@ -0,0 +1,95 @@
+import datetime
+import io
+from datetime import timedelta
+
+import pytest
+from icalendar import Calendar, Event
+
+from garbage.model.Garbage import Bio, GarbageRegistry, Glass, Mixed, Paper, Plastic
+from garbage.model.Schedule import Schedule
+from garbage.services.CalendarService import CalendarService
+from garbage.services.FileService import FileService
+from garbage.services.IcsWriter import IcsWriter
+
+CALENDAR_ID = "https://eko-region.pl/test.pdf#0"
+# adnotacje ze znakami specjalnymi TEXT i wielobajtowymi znakami na granicy zawijania
+NOTES = [
+    None,
+    "* -> możliwa zmiana daty",
+    "Odbiór; przesunięty, z powodu święta\nprosimy wystawić pojemnik do 6:00 \\ dziękujemy",
+    "Zażółć gęślą jaźń, ąęśćżźółń; " * 6,
+    "ś" * 80,
+]
+
+
+@pytest.fixture
+def schedule() -> Schedule:
+    schedule = Schedule()
+    types = [GarbageRegistry.instances[cls] for cls in (Mixed, Bio, Paper, Glass, Plastic)]
+    start = datetime.datetime(2025, 1, 2)
+    for n in range(120):
+        schedule.append(types[n % len(types)], start + timedelta(days=3 * n), NOTES[n % len(NOTES)])
+    return schedule
+
+
+def _parse(data: bytes):
+    """
+    Kalendarz odczytany przez icalendar: właściwości kalendarza i wydarzeń (bez DTSTAMP – chwila zapisu).
+    """
+    calendar = Calendar.from_ical(data)
+    properties = sorted((name, value.to_ical()) for name, value in calendar.items())
+    events = sorted(
+        tuple(sorted((name, value.to_ical()) for name, value in event.items() if name != "DTSTAMP"))
+        for event in calendar.walk("VEVENT")
+    )
+    return properties, events
+
+
+@pytest.mark.parametrize("recurrence", [False, True])
+def test_streaming_matches_icalendar(schedule, tmp_path, recurrence):
+    file_service = FileService(tmp_path)
+    outputs = {}
+    for streaming in (False, True):
+        path = tmp_path / f"streaming-{streaming}.ics"
+        CalendarService(file_service, schedule, CALENDAR_ID).prepare_calendar(path, streaming=streaming,
+                                                                              recurrence=recurrence)
+        outputs[streaming] = path.read_bytes()
+
+    assert _parse(outputs[True]) == _parse(outputs[False])
+    assert len(Calendar.from_ical(outputs[True]).walk("VEVENT")) > 0
+
+
+@pytest.mark.parametrize("text", NOTES[1:])
+def test_text_round_trip(text):
+    stream = io.BytesIO()
+    IcsWriter(stream).write_component("VEVENT", [("UID", "1"), ("COMMENT", text)])
+
+    event = Event.from_ical(stream.getvalue())
+    assert str(event["COMMENT"]) == text
+
+    reference = Event()
+    reference.add("COMMENT", text)
+    assert event["COMMENT"].to_ical() == reference["COMMENT"].to_ical()
+
+
+@pytest.mark.parametrize("text", NOTES[1:])
+def test_fold_keeps_lines_and_characters_whole(text):
+    folded = IcsWriter.text_line("COMMENT", text)
+
+    assert folded.endswith(IcsWriter.CRLF)
+    lines = folded.split(IcsWriter.CRLF)[:-1]
+    assert all(len(line) <= IcsWriter.MAX_LINE_OCTETS for line in lines)
+    assert all(line.startswith(b" ") for line in lines[1:])
+    # każda linia osobno jest poprawnym UTF-8 – zawinięcie nie przecina znaku
+    for line in lines:
+        line.decode("utf-8")
+    assert b"".join([lines[0], *(line[1:] for line in lines[1:])]).decode() == \
+        "COMMENT:" + IcsWriter.escape_text(text)
+
+
+def test_escape_text_matches_icalendar():
+    text = "a,b;c\\d\ne\r\nf"
+    reference = Event()
+    reference.add("COMMENT", text)
+
+    assert IcsWriter.escape_text(text).encode() == reference["COMMENT"].to_ical()
@@ -0,0 +1,72 @@
+import colorsys
+
+import numpy as np
+import pytest
+
+from garbage.services.FileService import FileService
+from garbage.services.ImageProcessingService import ImageProcessingService
+
+SENSITIVITIES = [0.1, 0.25, 0.5, 0.75, 1.0]
+
+
+def _reference_red_mask(img_bgr, sensitivity):
+    """
+    Dawna pętla po pikselach (colorsys.rgb_to_hsv), względem której sprawdzana jest wersja wektorowa.
+    """
+    hue_range = 0.03 + sensitivity * 0.07
+    min_saturation = 0.2 - sensitivity * 0.15
+
+    mask = np.zeros(img_bgr.shape[:2], dtype=bool)
+    for i in range(img_bgr.shape[0]):
+        for j in range(img_bgr.shape[1]):
+            b, g, r = (int(c) for c in img_bgr[i, j])
+            h, s, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+            mask[i, j] = (h < hue_range or h > 1 - hue_range) and s > min_saturation
+    return mask
+
+
+@pytest.fixture(scope="module")
+def scan() -> np.ndarray:
+    """
+    Obraz BGR z szumem, odcieniami szarości i czerwieniami wokół progów odcienia i nasycenia.
+    """
+    rng = np.random.default_rng(2025)
+    height, width = 240, 320
+    img = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    # szarości (zerowe nasycenie) i czyste kolory
+    img[:16, :256] = np.arange(256, dtype=np.uint8)[None, :, None]
+    img[16:24, :6] = [(0, 0, 255), (0, 255, 0), (255, 0, 0), (0, 0, 0), (255, 255, 255), (0, 0, 128)]
+
+    # czerwienie o odcieniu i nasyceniu w pobliżu progów dla każdej czułości
+    hues = np.concatenate([rng.uniform(0, 0.12, 4000), rng.uniform(0.88, 1, 4000)])
+    saturations = rng.uniform(0, 0.3, hues.size)
+    values = rng.uniform(0.2, 1, hues.size)
+    reds = [colorsys.hsv_to_rgb(h, s, v) for h, s, v in zip(hues, saturations, values)]
+    reds = np.round(np.array(reds)[:, ::-1] * 255).astype(np.uint8)
+    img[40:40 + 25, :320] = reds[:25 * 320].reshape(25, 320, 3)
+    return img
+
+
+def _crops(scan, count=6, seed=7):
+    rng = np.random.default_rng(seed)
+    height, width = scan.shape[:2]
+    for _ in range(count):
+        h, w = rng.integers(20, 70), rng.integers(20, 90)
+        y, x = rng.integers(0, height - h), rng.integers(0, width - w)
+        yield scan[y:y + h, x:x + w]
+    # pasek granicznych czerwieni i szarości w całości
+    yield scan[:72]
+
+
+@pytest.mark.parametrize("sensitivity", SENSITIVITIES)
+def test_replace_red_black_matches_colorsys_loop(tmp_path, scan, sensitivity):
+    service = ImageProcessingService(FileService(tmp_path), input_file=None)
+
+    for crop in _crops(scan):
+        expected_mask = _reference_red_mask(crop, sensitivity)
+        expected = crop.copy()
+        expected[expected_mask] = (0, 0, 0)
+
+        np.testing.assert_array_equal(ImageProcessingService._red_mask(crop, sensitivity), expected_mask)
+        np.testing.assert_array_equal(service._replace_red_black(crop, sensitivity), expected)
@@ -0,0 +1,90 @@
+import datetime
+from datetime import timedelta
+
+import pytest
+from dateutil.rrule import rruleset, rrulestr
+from icalendar import Calendar
+
+from garbage.model.Garbage import Bio, Glass, GarbageRegistry, Mixed, Paper
+from garbage.model.Schedule import Schedule
+from garbage.services.CalendarService import CalendarService
+from garbage.services.FileService import FileService
+from garbage.services.Recurrence import Series, compress, expand
+
+
+def _every(start, days, count):
+    return [start + timedelta(days=n * days) for n in range(count)]
+
+
+@pytest.fixture
+def schedule() -> Schedule:
+    """
+    Harmonogram roczny z typowymi nieregularnościami: przesunięcia świąteczne, zmiana rytmu latem,
+    pominięty termin, pojedyncze odbiory i wpis z adnotacją.
+    """
+    garbage = {cls: GarbageRegistry.instances[cls] for cls in (Mixed, Bio, Paper, Glass)}
+    schedule = Schedule()
+
+    mixed = _every(datetime.date(2025, 1, 7), 14, 26)
+    # odbiór przesunięty o dzień (święto) i jeden odwołany
+    mixed[8] += timedelta(days=1)
+    del mixed[15]
+    # latem co tydzień, poza sezonem co dwa tygodnie
+    bio = (_every(datetime.date(2025, 1, 9), 14, 8) + _every(datetime.date(2025, 4, 24), 7, 24)
+           + _every(datetime.date(2025, 10, 16), 14, 6))
+    paper = _every(datetime.date(2025, 1, 14), 28, 13)
+    glass = [datetime.date(2025, 2, 3), datetime.date(2025, 6, 17), datetime.date(2025, 11, 4)]
+
+    for cls, dates in ((Mixed, mixed), (Bio, bio), (Paper, paper), (Glass, glass)):
+        for date in dates:
+            schedule.append(garbage[cls], datetime.datetime.combine(date, datetime.time()))
+    schedule.append(garbage[Paper], datetime.datetime(2025, 12, 29), "dodatkowy odbiór")
+    return schedule
+
+
+def _collections(schedule) -> list[tuple[str, datetime.date]]:
+    return sorted((entry.garbage_type.name, entry.date.date()) for entry in schedule)
+
+
+def _ics_collections(calendar_path) -> list[tuple[str, datetime.date]]:
+    """
+    Odbiory zapisane w pliku ICS po rozwinięciu RRULE, EXDATE i RDATE przez dateutil.
+    """
+    types = {f"Śmieci {cls.name}": cls.name for cls in GarbageRegistry.registry}
+    collections = []
+    with open(calendar_path, "rb") as f:
+        calendar = Calendar.from_ical(f.read())
+    for event in calendar.walk("VEVENT"):
+        name = types[str(event["SUMMARY"])]
+        start = datetime.datetime.combine(event.decoded("DTSTART"), datetime.time())
+        if "RRULE" not in event:
+            collections.append((name, start.date()))
+            continue
+
+        dates = rruleset()
+        dates.rrule(rrulestr(event["RRULE"].to_ical().decode(), dtstart=start))
+        for prop, add in (("EXDATE", dates.exdate), ("RDATE", dates.rdate)):
+            values = event.get(prop, [])
+            for value in values if isinstance(values, list) else [values]:
+                for date in value.dts:
+                    add(datetime.datetime.combine(date.dt, datetime.time()))
+        collections += [(name, date.date()) for date in dates]
+    return sorted(collections)
+
+
+def test_expand_restores_compressed_schedule(schedule):
+    items = compress(schedule)
+
+    assert any(isinstance(item, Series) for item in items)
+    assert len(items) < len(schedule)
+    assert sorted((garbage_type.name, date) for garbage_type, date in expand(items)) == _collections(schedule)
+
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["icalendar", "IcsWriter"])
+def test_recurring_calendar_expands_to_schedule(tmp_path, schedule, streaming):
+    calendar_path = tmp_path / "Eko-Region-2025.ics"
+    service = CalendarService(FileService(tmp_path), schedule, calendar_id="test")
+    service.prepare_calendar(calendar_path, streaming=streaming, recurrence=True)
+
+    assert b"RRULE" in calendar_path.read_bytes()
+    assert _ics_collections(calendar_path) == _collections(schedule)
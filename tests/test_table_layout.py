@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+from garbage.services.TableLayout import TableLayout
+
+
+def _elements(texts, boxes, anchor):
+    elements = []
+    for text, bbox in zip(texts, boxes):
+        x_coords = [p[0] for p in bbox]
+        y_coords = [p[1] for p in bbox]
+        y = max(y_coords) if anchor == "baseline" else np.mean(y_coords)
+        elements.append({"text": text, "x": np.mean(x_coords), "y": y})
+    return elements
+
+
+def _reference_columns(elements, tolerance_x):
+    all_x = sorted([e["x"] for e in elements])
+    col_groups = []
+    cur = [all_x[0]]
+    for x in all_x[1:]:
+        if abs(x - cur[-1]) < tolerance_x:
+            cur.append(x)
+        else:
+            col_groups.append(cur)
+            cur = [x]
+    col_groups.append(cur)
+    return [np.mean(g) for g in col_groups]
+
+
+def _reference_cells(rows, col_centers, cell_sort_key):
+    final_rows = []
+    for row in rows:
+        cols = {i: [] for i in range(len(col_centers))}
+        for el in row:
+            cols[int(np.argmin([abs(el["x"] - c) for c in col_centers]))].append(el)
+        # dawne scalanie linii w komórce też łączyło je spacją – wynik to teksty w kolejności (Y, X)
+        final_rows.append([" ".join(e["text"] for e in sorted(cols[i], key=cell_sort_key))
+                           for i in range(len(col_centers))])
+    return final_rows
+
+
+def _reference_header_layout(texts, boxes, tolerance_y, tolerance_x):
+    """
+    Dawne OcrService.ocr: wiersze po środku ramki w kolejności Y, komórki w kolejności X, potem Y.
+    """
+    elements = _elements(texts, boxes, "center")
+    elements.sort(key=lambda e: e["y"])
+    rows, current_row, last_y = [], [], None
+    for el in elements:
+        if last_y is None or abs(el["y"] - last_y) < tolerance_y:
+            current_row.append(el)
+        else:
+            rows.append(current_row)
+            current_row = [el]
+        last_y = el["y"]
+    rows.append(current_row)
+
+    rows = [sorted(row, key=lambda e: e["x"]) for row in rows]
+    return _reference_cells(rows, _reference_columns(elements, tolerance_x), lambda e: e["y"])
+
+
+def _reference_body_layout(texts, boxes, tolerance_y, tolerance_x):
+    """
+    Dawne OcrService.process_table_image: wiersze po dolnej krawędzi ramki w kolejności (round(Y / 5), X).
+    """
+    elements = _elements(texts, boxes, "baseline")
+    elements.sort(key=lambda e: (round(e["y"] / 5), e["x"]))
+    rows, current_row, last_y = [], [], None
+    for el in elements:
+        if last_y is None or abs(el["y"] - last_y) < tolerance_y:
+            current_row.append(el)
+        else:
+            rows.append(current_row)
+            current_row = [el]
+        last_y = el["y"]
+    rows.append(current_row)
+
+    return _reference_cells(rows, _reference_columns(elements, tolerance_x), lambda e: (e["y"], e["x"]))
+
+
+def _box(x, y, width, height):
+    return [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+
+
+def _synthetic_table(rng, rows, columns, jitter=3.0):
+    """
+    Fragmenty tekstu jak z easyocr: komórki z 0–3 fragmentami (także w dwóch liniach), lekko przesunięte ramki.
+    Odstęp między wierszami (90 px) jest wyraźnie większy od tolerancji, a dwie linie komórki mieszczą się w niej.
+    """
+    texts, boxes = [], []
+    for row in range(rows):
+        for column in range(columns):
+            for fragment in range(rng.integers(0, 4)):
+                line, part = divmod(fragment, 2)
+                x = 40 + column * 120 + part * 34 + rng.normal(0, jitter)
+                y = 30 + row * 90 + line * 20 + rng.normal(0, jitter)
+                texts.append(f"{row}.{column}.{fragment}")
+                boxes.append(_box(x, y, 28 + rng.normal(0, jitter), 14 + rng.normal(0, 1)))
+    order = rng.permutation(len(texts))
+    return [texts[i] for i in order], [boxes[i] for i in order]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_header_layout_matches_previous_grouping(seed):
+    rng = np.random.default_rng(seed)
+    texts, boxes = _synthetic_table(rng, rows=int(rng.integers(1, 4)), columns=int(rng.integers(1, 12)))
+    xs, ys = TableLayout.anchor_points(boxes, anchor="center")
+    if not texts:
+        assert TableLayout(25, 60).build(texts, xs, ys) == []
+        return
+    assert TableLayout(25, 60).build(texts, xs, ys) == _reference_header_layout(texts, boxes, 25, 60)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_body_layout_matches_previous_grouping(seed):
+    rng = np.random.default_rng(100 + seed)
+    texts, boxes = _synthetic_table(rng, rows=int(rng.integers(5, 40)), columns=int(rng.integers(2, 10)))
+
+    xs, ys = TableLayout.anchor_points(boxes, anchor="baseline")
+    assert TableLayout(35, 80).build(texts, xs, ys) == _reference_body_layout(texts, boxes, 35, 80)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_grid_coordinates_match_previous_grouping(seed):
+    """
+    Całkowite współrzędne z dużą liczbą remisów (równe Y, równe X, punkt w połowie między kolumnami).
+    """
+    rng = np.random.default_rng(200 + seed)
+    count = int(rng.integers(1, 80))
+    texts = [f"t{i}" for i in range(count)]
+    boxes = [_box(int(x), int(y), 0, 0)
+             for x, y in zip(rng.integers(0, 60, count) * 5, rng.integers(0, 12, count) * 10)]
+
+    xs, ys = TableLayout.anchor_points(boxes, anchor="center")
+    assert TableLayout(25, 12).build(texts, xs, ys) == _reference_header_layout(texts, boxes, 25, 12)
+
+
+def test_tie_between_columns_goes_left():
+    # kolumny o środkach 30 i 90; element w x=60 należy do pierwszej, ale jest w równej odległości od obu
+    xs = [0, 20, 40, 60, 85, 95]
+    texts = ["a", "b", "c", "d", "e", "f"]
+    layout = TableLayout(tolerance_y=10, tolerance_x=25)
+
+    assert layout._column_centers(np.array(xs, dtype=float)).tolist() == [30.0, 90.0]
+    assert layout.build(texts, xs, [0] * 6) == [["a b c d", "e f"]]
+    assert layout.build(texts, xs, [0] * 6) == \
+        _reference_header_layout(texts, [_box(x, 0, 0, 0) for x in xs], 10, 25)
+
+
+def test_empty_input_gives_empty_table():
+    assert TableLayout(25, 60).build([], [], []) == []